@@ -1,5 +1,61 @@
 from django.contrib import admin
-from .models import Event, Category, Participation, EventAttachment, Comment
+from django.db.models import Count
+
+from .models import Event, Category, Participation, EventAttachment, Comment, WaitlistEntry
+from .pagination import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Lista dla tabel z milionami wierszy: szacowana liczba wyników zamiast
+    dwóch pełnych COUNT(*) i wyszukiwanie prefiksowe po polach z indeksem
+    (migracja 0009). Każde pole z search_fields jest przeszukiwane osobnym
+    zapytaniem, a wyniki łączy UNION - OR w jednym zapytaniu przez JOIN
+    wymusiłby przejście całej tabeli.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term or not self.search_fields:
+            return queryset, False
+        manager = self.model._default_manager
+        matches = [
+            manager.filter(**{f'{field}__istartswith': term}).order_by().values('pk')
+            for field in self.search_fields
+        ]
+        return queryset.filter(pk__in=matches[0].union(*matches[1:])), False
+
+
+class EventIdFilter(admin.SimpleListFilter):
+    """
+    Filtr po identyfikatorze wydarzenia wpisywanym w pole tekstowe - zamiast
+    listy wszystkich wydarzeń w panelu bocznym.
+    """
+    title = 'wydarzenie (ID)'
+    parameter_name = 'event'
+    template = 'admin/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        # Filtr jest wyświetlany tylko z niepustą listą - wartość wpisuje się ręcznie
+        return [('', '')]
+
+    def choices(self, changelist):
+        # Pozostałe parametry listy jako ukryte pola formularza
+        yield {
+            'query_parts': [
+                (key, value)
+                for key, values in changelist.get_filters_params().items() if key != self.parameter_name
+                for value in (values if isinstance(values, list) else [values])
+            ],
+        }
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(event_id=value)
+        return queryset
 
 
 @admin.register(Category)
@@ -9,21 +65,25 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ['name']
     list_per_page = 20
 
-    def event_count(self, obj):
-        return obj.event_set.count()
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(event_count=Count('event'))
 
-    event_count.short_description = 'Liczba wydarzeń'
+    @admin.display(description='Liczba wydarzeń', ordering='event_count')
+    def event_count(self, obj):
+        return obj.event_count
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(LargeTableAdmin):
     list_display = ['title', 'organizer', 'start_date', 'location', 'category', 'status', 'participants_count',
                     'created_at']
+    # Zakresy dat przez filtr start_date - date_hierarchy liczyłoby MIN/MAX i daty po całej tabeli
     list_filter = ['category', 'status', 'start_date', 'created_at']
-    search_fields = ['title', 'description', 'location', 'organizer__username']
+    search_fields = ['title', 'location', 'organizer__username']
     list_editable = ['status']
-    readonly_fields = ['created_at', 'updated_at']
-    date_hierarchy = 'start_date'
+    list_select_related = ['organizer', 'category']
+    autocomplete_fields = ['organizer']
+    readonly_fields = ['participants_count', 'created_at', 'updated_at']
     list_per_page = 25
     fieldsets = (
         ('Podstawowe informacje', {
@@ -33,7 +93,7 @@ class EventAdmin(admin.ModelAdmin):
             'fields': ('location', 'start_date', 'end_date', 'category')
         }),
         ('Ograniczenia i status', {
-            'fields': ('max_participants', 'status')
+            'fields': ('max_participants', 'participants_count', 'status')
         }),
         ('Metadane', {
             'fields': ('created_at', 'updated_at'),
@@ -41,17 +101,13 @@ class EventAdmin(admin.ModelAdmin):
         }),
     )
 
-    def participants_count(self, obj):
-        return obj.participants.count()
-
-    participants_count.short_description = 'Uczestnicy'
-
 
 @admin.register(Participation)
-class ParticipationAdmin(admin.ModelAdmin):
+class ParticipationAdmin(LargeTableAdmin):
     list_display = ['user', 'event', 'registered_at']
-    list_filter = ['registered_at', 'event']
+    list_filter = ['registered_at', EventIdFilter]
     search_fields = ['user__username', 'event__title']
+    autocomplete_fields = ['user', 'event']
     readonly_fields = ['registered_at']
     list_per_page = 25
 
@@ -59,11 +115,25 @@ class ParticipationAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user', 'event')
 
 
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(LargeTableAdmin):
+    list_display = ['user', 'event', 'created_at']
+    list_filter = ['created_at', EventIdFilter]
+    search_fields = ['user__username', 'event__title']
+    autocomplete_fields = ['user', 'event']
+    readonly_fields = ['created_at']
+    list_per_page = 25
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'event')
+
+
 @admin.register(EventAttachment)
-class EventAttachmentAdmin(admin.ModelAdmin):
+class EventAttachmentAdmin(LargeTableAdmin):
     list_display = ['name', 'event', 'uploaded_at', 'file']
-    list_filter = ['uploaded_at']
+    list_filter = ['uploaded_at', EventIdFilter]
     search_fields = ['name', 'event__title']
+    autocomplete_fields = ['event']
     readonly_fields = ['uploaded_at']
     list_per_page = 25
 
@@ -72,10 +142,11 @@ class EventAttachmentAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ['author', 'event', 'created_at', 'content_preview']
-    list_filter = ['created_at', 'event']
-    search_fields = ['author__username', 'event__title', 'content']
+    list_filter = ['created_at', EventIdFilter]
+    search_fields = ['author__username', 'event__title']
+    autocomplete_fields = ['author', 'event']
     readonly_fields = ['created_at', 'updated_at']
     list_per_page = 25
 
@@ -86,4 +157,3 @@ class CommentAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('author', 'event')
-
@@ -0,0 +1,168 @@
+"""
+JSON API tylko do odczytu (/api/v1/) dla aplikacji mobilnej i kiosków.
+
+Lista przyjmuje te same filtry i sortowania co EventListView (category,
+search, sort) i jest stronicowana kursorem (przy sortowaniu po trafności -
+numerem strony). Parametr fields wybiera kolumny: zapytanie pobiera przez
+.values() tylko je, bez tworzenia obiektów modelu. ETag liczony jest z pk,
+updated_at i licznika uczestników zwracanych wierszy, więc niezmieniona
+odpowiedź kończy się 304 bez kodowania JSON. Odpowiedzi są kompresowane gzipem.
+"""
+import hashlib
+
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_safe
+from SWBO_Project.db_routing import replica_reads
+
+from .models import Event
+from .pagination import InvalidCursor, paginate_by_cursor
+from .views import EventListView
+
+# Nazwa w API -> wyrażenie dla .values()
+FIELDS = {
+    'id': 'pk',
+    'title': 'title',
+    'short_description': 'short_description',
+    'description': 'description',
+    'location': 'location',
+    'start_date': 'start_date',
+    'end_date': 'end_date',
+    'status': 'status',
+    'category_id': 'category_id',
+    'category': 'category__name',
+    'organizer': 'organizer__username',
+    'max_participants': 'max_participants',
+    'participants_count': 'participants_count',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+LIST_FIELDS = [
+    'id', 'title', 'short_description', 'location', 'start_date', 'end_date',
+    'category', 'max_participants', 'participants_count',
+]
+DETAIL_FIELDS = list(FIELDS)
+# Potrzebne do ETag i kursora niezależnie od wybranych pól
+VERSION_FIELDS = ['pk', 'updated_at', 'participants_count']
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class BadRequest(Exception):
+    pass
+
+
+def error_response(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def selected_fields(request, default):
+    if not request.GET.get('fields'):
+        return default
+    names = [name.strip() for name in request.GET['fields'].split(',') if name.strip()]
+    unknown = [name for name in names if name not in FIELDS]
+    if unknown or not names:
+        raise BadRequest(f'Nieznane pola: {", ".join(unknown) or "(puste)"}. Dostępne: {", ".join(FIELDS)}.')
+    return list(dict.fromkeys(names))
+
+
+def page_limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise BadRequest('limit musi być liczbą.')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def page_url(request, **params):
+    query = request.GET.copy()
+    for name in ('cursor', 'page'):
+        query.pop(name, None)
+    query.update(params)
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def conditional_json(request, data, rows, fields):
+    """
+    JsonResponse z ETag (z wersji wierszy i wybranych pól) albo 304. Bez
+    Last-Modified: najnowsze updated_at zwracanych wierszy nie zmienia się po
+    usunięciu albo wycofaniu wydarzenia, więc samo If-Modified-Since dawałoby
+    nieaktualne 304. ETag obejmuje listę wierszy, więc wyłapuje i te zmiany.
+    """
+    version = repr((fields, [(row['pk'], row['updated_at'], row['participants_count']) for row in rows],
+                    data.get('next'), data.get('previous')))
+    etag = f'"{hashlib.md5(version.encode(), usedforsecurity=False).hexdigest()}"'
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+    response['ETag'] = etag
+    # Klient może trzymać odpowiedź, ale przed użyciem pyta o zmiany
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def serialize(rows, fields):
+    return [{name: row[FIELDS[name]] for name in fields} for row in rows]
+
+
+@replica_reads
+@require_safe
+@gzip_page
+def event_list(request):
+    try:
+        fields = selected_fields(request, LIST_FIELDS)
+        limit = page_limit(request)
+    except BadRequest as error:
+        return error_response(str(error))
+
+    view = EventListView()
+    view.setup(request)
+    queryset = view.get_queryset()
+    sort_field = view.sort.lstrip('-')
+    columns = list(dict.fromkeys(VERSION_FIELDS + [FIELDS[name] for name in fields]
+                                 + ([] if view.sort == 'relevance' else [sort_field])))
+    data = {}
+
+    if view.sort == 'relevance':
+        # Trafność nie nadaje się na kursor - strony numerowane, bez COUNT(*)
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            return error_response('page musi być liczbą.')
+        offset = (page - 1) * limit
+        rows = list(queryset.values(*columns)[offset:offset + limit + 1])
+        data['next'] = page_url(request, page=page + 1) if len(rows) > limit else None
+        data['previous'] = page_url(request, page=page - 1) if page > 1 else None
+        rows = rows[:limit]
+    else:
+        try:
+            result = paginate_by_cursor(queryset.values(*columns), view.sort, request.GET.get('cursor'), limit)
+        except InvalidCursor:
+            return error_response('Nieprawidłowy kursor.')
+        rows = result.object_list
+        data['next'] = page_url(request, cursor=result.next_cursor) if result.has_next() else None
+        data['previous'] = page_url(request, cursor=result.previous_cursor) if result.has_previous() else None
+
+    data['results'] = serialize(rows, fields)
+    return conditional_json(request, data, rows, fields)
+
+
+@replica_reads
+@require_safe
+@gzip_page
+def event_detail(request, pk):
+    try:
+        fields = selected_fields(request, DETAIL_FIELDS)
+    except BadRequest as error:
+        return error_response(str(error))
+
+    columns = list(dict.fromkeys(VERSION_FIELDS + ['status', 'organizer_id'] + [FIELDS[name] for name in fields]))
+    row = Event.objects.filter(pk=pk).values(*columns).first()
+    # Szkice widzi tylko organizator
+    if row is None or (row['status'] == 'draft' and row['organizer_id'] != request.user.pk):
+        return error_response('Nie znaleziono wydarzenia.', status=404)
+    return conditional_json(request, serialize([row], fields)[0], [row], fields)
+
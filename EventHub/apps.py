@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EventhubConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'EventHub'
+
+    def ready(self):
+        from . import checks  # noqa: F401
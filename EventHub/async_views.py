@@ -0,0 +1,122 @@
+"""
+Asynchroniczne wersje najczęściej odwiedzanych stron (lista, szczegóły
+wydarzenia, "Moje wydarzenia") dla wdrożenia ASGI (SERVER_MODE=asgi).
+
+Zapytania idą przez asynchroniczny interfejs ORM, a cache przez aget/aset,
+więc czekanie na bazę, cache i wolnego klienta nie blokuje procesu - jeden
+worker uvicorna obsługuje wiele takich żądań naraz. Renderowanie szablonu
+(w tym leniwe zapytania fragmentów, sesja i komunikaty) działa w wątku przez
+sync_to_async. Logika zapytań jest wspólna z widokami w views.py.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils import timezone
+from SWBO_Project.db_routing import replica_reads
+
+from .caching import aget_dashboard_version, aget_fragment_versions
+from .categories import get_categories
+from .ical import feed_token
+from .pagination import CountedPaginator, InvalidCursor, paginate_by_cursor
+from .views import (
+    MY_EVENTS_PAGINATE_BY, EventDetailView, EventListView, event_detail_context, event_detail_queryset,
+    my_events_counts, my_events_params, my_events_period, my_events_querysets,
+)
+
+arender = sync_to_async(render)
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+@replica_reads
+async def event_list(request):
+    view = EventListView()
+    view.setup(request)
+    queryset = view.get_queryset()
+    per_page = view.paginate_by
+
+    if settings.EVENT_LIST_PAGINATION == 'cursor' and view.sort != 'relevance':
+        try:
+            page = await sync_to_async(paginate_by_cursor)(queryset, view.sort, request.GET.get('cursor'), per_page)
+        except InvalidCursor:
+            raise Http404('Nieprawidłowy kursor stronicowania.')
+        paginator = None
+    else:
+        paginator = CountedPaginator(queryset, per_page, count=await queryset.acount())
+        number = request.GET.get('page') or 1
+        if number == 'last':
+            number = paginator.num_pages
+        try:
+            page = paginator.page(number)
+        except InvalidPage:
+            raise Http404('Nieprawidłowa strona.')
+        page.object_list = await alist(page.object_list)
+
+    return await arender(request, view.template_name, {
+        'view': view,
+        'paginator': paginator,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+        'object_list': page.object_list,
+        'events': page.object_list,
+        'categories': await sync_to_async(get_categories)(),
+    })
+
+
+@replica_reads
+async def event_detail(request, pk):
+    # Leniwy request.user odpytałby bazę synchronicznie - podmieniamy na pobranego
+    request.user = user = await request.auser()
+    event = await event_detail_queryset(user).filter(pk=pk).afirst()
+    if event is None:
+        raise Http404('Nie znaleziono wydarzenia.')
+
+    context = event_detail_context(
+        request, event, await aget_fragment_versions(event.pk), EventDetailView.comments_paginate_by
+    )
+    context.update(object=event, event=event)
+    return await arender(request, EventDetailView.template_name, context)
+
+
+@replica_reads
+@login_required
+async def my_events(request):
+    request.user = user = await request.auser()
+    tab, period = my_events_params(request)
+    now = timezone.now()
+    querysets = my_events_querysets(user)
+    cache_prefix = f'eventhub:user:{user.pk}:dashboard:{await aget_dashboard_version(user.pk)}'
+    timeout = settings.MY_EVENTS_CACHE_TIMEOUT
+
+    counts = await cache.aget(f'{cache_prefix}:counts')
+    if counts is None:
+        counts = {
+            name: await queryset.aaggregate(**my_events_counts(now)) for name, queryset in querysets.items()
+        }
+        await cache.aset(f'{cache_prefix}:counts', counts, timeout)
+
+    events = my_events_period(querysets[tab], period, now)
+    paginator = CountedPaginator(events, MY_EVENTS_PAGINATE_BY, count=counts[tab][period])
+    page = paginator.get_page(request.GET.get('page'))
+
+    page_key = f'{cache_prefix}:{tab}:{period}:{page.number}'
+    object_list = await cache.aget(page_key)
+    if object_list is None:
+        object_list = await alist(page.object_list)
+        await cache.aset(page_key, object_list, timeout)
+    page.object_list = object_list
+
+    return await arender(request, 'events/my_events.html', {
+        'tab': tab,
+        'period': period,
+        'counts': counts,
+        'page_obj': page,
+        'calendar_url': reverse('user-calendar', args=[await sync_to_async(feed_token)(user)]),
+    })
@@ -0,0 +1,91 @@
+"""
+Wersje fragmentów strony wydarzenia przechowywane w cache.
+
+Każdy blok (załączniki, uczestnicy, komentarze) ma własny znacznik wersji
+będący częścią klucza {% cache %}. Zmiana danych podbija znacznik, więc stare
+fragmenty przestają być używane i wygasają same - bez przeszukiwania cache.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+FRAGMENT_BLOCKS = ('attachments', 'participants', 'comments')
+
+
+def _version_key(event_id, block):
+    return f'eventhub:event:{event_id}:{block}:version'
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def get_fragment_versions(event_id):
+    """
+    Zwraca słownik {blok: wersja} jednym odczytem z cache.
+    """
+    keys = {block: _version_key(event_id, block) for block in FRAGMENT_BLOCKS}
+    stored = cache.get_many(keys.values())
+
+    versions, missing = {}, {}
+    for block, key in keys.items():
+        if key in stored:
+            versions[block] = stored[key]
+        else:
+            versions[block] = missing[key] = _new_version()
+    if missing:
+        cache.set_many(missing, timeout=None)
+    return versions
+
+
+async def aget_fragment_versions(event_id):
+    keys = {block: _version_key(event_id, block) for block in FRAGMENT_BLOCKS}
+    stored = await cache.aget_many(keys.values())
+
+    versions, missing = {}, {}
+    for block, key in keys.items():
+        if key in stored:
+            versions[block] = stored[key]
+        else:
+            versions[block] = missing[key] = _new_version()
+    if missing:
+        await cache.aset_many(missing, timeout=None)
+    return versions
+
+
+def bump_fragment_version(event_id, block):
+    """
+    Unieważnia fragment po zatwierdzeniu transakcji - wcześniej inne żądanie
+    mogłoby zapisać w cache stan sprzed zmiany pod nową wersją.
+    """
+    transaction.on_commit(lambda: cache.set(_version_key(event_id, block), _new_version(), timeout=None))
+
+
+def _dashboard_key(user_id):
+    return f'eventhub:user:{user_id}:dashboard:version'
+
+
+def get_dashboard_version(user_id):
+    """
+    Wersja danych panelu "Moje wydarzenia" użytkownika - część kluczy jego wpisów w cache.
+    """
+    key = _dashboard_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        cache.set(key, version, timeout=None)
+    return version
+
+
+async def aget_dashboard_version(user_id):
+    key = _dashboard_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = _new_version()
+        await cache.aset(key, version, timeout=None)
+    return version
+
+
+def bump_dashboard_version(user_id):
+    transaction.on_commit(lambda: cache.set(_dashboard_key(user_id), _new_version(), timeout=None))
@@ -0,0 +1,78 @@
+"""
+Rejestr kategorii - mała, rzadko zmieniana tabela czytana na prawie każdej stronie.
+
+Lista kategorii leży we wspólnym cache pod kluczem z numerem wersji, a każdy
+proces trzyma dodatkowo własną kopię. Odczyt to jedno pobranie wersji
+z cache; zapytanie do bazy pada tylko po zmianie kategorii. Zapis lub
+usunięcie kategorii (sygnały w models.py) ustawia nową wersję, więc
+wszystkie workery gunicorna przełączają się na świeże dane przy kolejnym żądaniu.
+Wymaga to cache wspólnego dla workerów - przy WEB_CONCURRENCY > 1 jest on
+domyślny, a jawnie wybrany locmem zgłasza ostrzeżenie EventHub.W001.
+Zmiany przez QuerySet.update() omijają sygnały - wtedy trzeba wywołać invalidate().
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'eventhub:categories:version'
+DATA_KEY = 'eventhub:categories:{}'
+# Dane starych wersji nie są potrzebne - wygasają same
+DATA_TIMEOUT = 24 * 60 * 60
+
+# (wersja, kategorie, słownik pk -> kategoria) - podmieniane w całości, bez blokad
+_memo = None
+
+
+def _query():
+    from .models import Category
+
+    # Zawsze z bazy głównej: opóźniona replika zapisałaby w cache stan sprzed zmiany
+    # pod nową wersją. Zapytanie pada raz na zmianę kategorii, więc nie obciąża bazy.
+    return tuple(Category.objects.using('default').order_by('name', 'pk'))
+
+
+def _load(version):
+    categories = cache.get(DATA_KEY.format(version))
+    if categories is None:
+        categories = _query()
+        cache.set(DATA_KEY.format(version), categories, timeout=DATA_TIMEOUT)
+    return categories
+
+
+def _current():
+    global _memo
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # add() - przy wyścigu workerów wszystkie przyjmą tę samą wersję
+        cache.add(VERSION_KEY, uuid.uuid4().hex[:12], timeout=None)
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            # Cache nic nie przechowuje (DummyCache) - bez wersji nie da się unieważnić kopii
+            categories = _query()
+            return None, categories, {category.pk: category for category in categories}
+
+    memo = _memo
+    if memo is None or memo[0] != version:
+        categories = _load(version)
+        memo = _memo = (version, categories, {category.pk: category for category in categories})
+    return memo
+
+
+def get_categories():
+    """
+    Wszystkie kategorie posortowane po nazwie.
+    """
+    return _current()[1]
+
+
+def get_category(pk):
+    return _current()[2].get(pk)
+
+
+def categories_exist():
+    return bool(get_categories())
+
+
+def invalidate():
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, uuid.uuid4().hex[:12], timeout=None))
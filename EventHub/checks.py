@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Wersja rejestru kategorii (categories.py) jest w cache - zmiana kategorii
+    w jednym workerze musi być widoczna w pozostałych.
+    """
+    if settings.WEB_CONCURRENCY > 1 and isinstance(caches['default'], LocMemCache):
+        return [Warning(
+            f'Cache locmem przy WEB_CONCURRENCY={settings.WEB_CONCURRENCY}: każdy worker ma własny cache, '
+            'więc po zmianie kategorii pozostałe workery pokazują stare dane.',
+            hint="Ustaw CACHE_BACKEND na 'file', 'redis' albo 'memcached'.",
+            id='EventHub.W001',
+        )]
+    return []
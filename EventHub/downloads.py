@@ -0,0 +1,147 @@
+"""
+Wysyłanie plików załączników.
+
+Jeśli przed aplikacją stoi serwer obsługujący X-Accel-Redirect (nginx) lub
+X-Sendfile (Apache, lighttpd), widok zwraca tylko nagłówki, a plik - razem
+z zakresami i odpowiedziami 304 - wysyła serwer. W przeciwnym razie plik
+idzie przez FileResponse: gunicorn przekazuje go do sendfile(), bez
+kopiowania przez Pythona, a pod ASGI jest czytany blokami przez iterator
+asynchroniczny (zob. streaming.py), zamiast trafiać w całości do pamięci.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .storage import BLOB_PREFIX
+from .streaming import file_content
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOB_DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+def file_etag(name, stat):
+    # Nazwa blobu to skrót treści - najlepszy możliwy silny ETag
+    digest = os.path.splitext(os.path.basename(name))[0]
+    if name.startswith(f'{BLOB_PREFIX}/') and BLOB_DIGEST.match(digest):
+        return f'"{digest}"'
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    Zwraca (początek, koniec) włącznie dla pojedynczego zakresu, None gdy
+    nagłówka nie ma albo opisuje kilka zakresów (wtedy wysyłany jest cały plik)
+    i False, gdy zakresu nie da się spełnić.
+    """
+    match = RANGE_PATTERN.match(header.replace(' ', '')) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500: ostatnie 500 bajtów
+        length = int(last)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+class RangeFile:
+    """
+    Otwarty plik ograniczony do zakresu bajtów. fileno() pozwala serwerowi
+    WSGI użyć sendfile() od bieżącej pozycji, read() nie wychodzi poza zakres.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def serve_file(request, storage, name, filename):
+    path = storage.path(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    stat = os.stat(path)
+    etag = file_etag(name, stat)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    backend = settings.ATTACHMENT_SENDFILE_BACKEND
+    if backend == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.ATTACHMENT_SENDFILE_URL + name)
+    elif backend == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+    else:
+        response = stream_file(request, path, stat.st_size, etag, last_modified, content_type)
+
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Dostęp zależy od użytkownika - nie dla współdzielonych cache po drodze
+    response['Cache-Control'] = 'private'
+    return response
+
+
+def stream_file(request, path, size, etag, last_modified, content_type):
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if request.headers.get('Range') and (not if_range or if_range_matches(if_range, etag, last_modified)):
+        byte_range = parse_range(request.headers['Range'], size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file_content(request, file), content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            file_content(request, RangeFile(file, start, length)), content_type=content_type, status=206,
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def if_range_matches(value, etag, last_modified):
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    modified = parse_http_date_safe(value)
+    return modified is not None and modified >= last_modified
@@ -1,16 +1,52 @@
 from django import forms
-from .models import Event, Comment, EventAttachment, Category
+from django.template.defaultfilters import filesizeformat
+
+from .categories import categories_exist, get_categories, get_category
+from .models import Event, Comment, EventAttachment
+from .storage import attachment_max_size
+
+
+class CategoryChoiceIterator(forms.models.ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for category in get_categories():
+            yield self.choice(category)
+
+    def __len__(self):
+        return len(get_categories()) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or categories_exist()
+
+
+class CategoryChoiceField(forms.ModelChoiceField):
+    """
+    Pole kategorii korzystające z rejestru kategorii - bez zapytań przy
+    renderowaniu listy wyboru i przy walidacji wybranej wartości.
+    """
+    iterator = CategoryChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            category = get_category(int(value))
+        except (TypeError, ValueError):
+            category = None
+        if category is None:
+            raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        return category
 
 
 class EventForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Jeśli nie ma kategorii, ukryj pole kategorii
-        if not Category.objects.exists():
+        if not categories_exist():
             self.fields.pop('category', None)
         else:
             self.fields['category'].empty_label = "Wybierz kategorię"
-            self.fields['category'].queryset = Category.objects.all()
 
     class Meta:
         model = Event
@@ -18,6 +54,7 @@ class EventForm(forms.ModelForm):
             'title', 'short_description', 'description', 'location',
             'start_date', 'end_date', 'category', 'max_participants', 'status'
         ]
+        field_classes = {'category': CategoryChoiceField}
         widgets = {
             'start_date': forms.DateTimeInput(attrs={
                 'type': 'datetime-local',
@@ -92,4 +129,13 @@ class AttachmentForm(forms.ModelForm):
                 'placeholder': 'Nazwa załącznika...'
             }),
             'file': forms.FileInput(attrs={'class': 'form-control'})
-        }
\ No newline at end of file
+        }
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        max_size = attachment_max_size()
+        if file and max_size and file.size > max_size:
+            raise forms.ValidationError(
+                f'Plik jest za duży. Maksymalny rozmiar to {filesizeformat(max_size)}.'
+            )
+        return file
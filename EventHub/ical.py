@@ -0,0 +1,153 @@
+"""
+Kanały iCalendar (.ics) do subskrypcji w kalendarzach.
+
+Kalendarze odpytują kanały co kilka minut, więc każde żądanie zaczyna się od
+jednego zapytania agregującego: najnowsze updated_at i liczba wydarzeń
+w zakresie (liczba wyłapuje usunięcia). Z nich powstaje ETag - niezmieniony
+kanał kończy się odpowiedzią 304. Last-Modified nie jest wysyłany: najnowsze
+updated_at nie zmienia się, gdy wydarzenie znika z kanału. Gotowe kanały do
+ICAL_FEED_CACHE_MAX_EVENTS wydarzeń leżą w cache pod kluczem z tym samym
+znacznikiem, większe są generowane strumieniowo, paczkami wierszy z kursora
+(pod ASGI przez iterator asynchroniczny, zob. streaming.py).
+
+Token prywatnego kanału podpisuje identyfikator użytkownika razem z wersją
+z profilu; reset adresu podbija wersję i unieważnia wcześniejsze tokeny.
+"""
+import hashlib
+from datetime import timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header
+from users.models import get_profile
+
+from .streaming import streaming_content
+
+CHUNK_SIZE = 500
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+TOKEN_SALT = 'EventHub.ical'
+FIELDS = [
+    'pk', 'title', 'short_description', 'location', 'start_date', 'end_date', 'status', 'updated_at',
+]
+STATUSES = {'published': 'CONFIRMED', 'cancelled': 'CANCELLED', 'draft': 'TENTATIVE'}
+
+
+def feed_token(user):
+    version = get_profile(user).calendar_token_version
+    # Wersja 0 bez sufiksu - adresy wydane przed wprowadzeniem wersji nadal działają
+    value = f'{user.pk}:{version}' if version else str(user.pk)
+    return signing.Signer(salt=TOKEN_SALT).sign(value)
+
+
+def token_owner(token):
+    """
+    (identyfikator użytkownika, wersja tokenu) z podpisanego tokenu prywatnego kanału albo None.
+    """
+    try:
+        user_id, _, version = signing.Signer(salt=TOKEN_SALT).unsign(token).partition(':')
+        return int(user_id), int(version or 0)
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def escape(value):
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """
+    Zawija linię co 75 bajtów (RFC 5545), nie rozcinając znaków UTF-8.
+    """
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Cofnięcie do początku znaku wielobajtowego
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_datetime(value):
+    return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def vevent(event, request, domain):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.pk}@{domain}',
+        f'DTSTAMP:{format_datetime(event.updated_at)}',
+        f'LAST-MODIFIED:{format_datetime(event.updated_at)}',
+        f'DTSTART:{format_datetime(event.start_date)}',
+        f'DTEND:{format_datetime(event.end_date)}',
+        f'SUMMARY:{escape(event.title)}',
+        f'LOCATION:{escape(event.location)}',
+        f'DESCRIPTION:{escape(event.short_description)}',
+        f'URL:{request.build_absolute_uri(event.get_absolute_url())}',
+        f'STATUS:{STATUSES.get(event.status, "CONFIRMED")}',
+        'END:VEVENT',
+    ]
+    return ''.join(fold(line) for line in lines)
+
+
+def generate(queryset, request, name):
+    domain = request.get_host().split(':')[0]
+    header = [
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:-//{domain}//EventHub//PL',
+        'CALSCALE:GREGORIAN', 'METHOD:PUBLISH', f'X-WR-CALNAME:{escape(name)}',
+    ]
+    yield ''.join(fold(line) for line in header)
+
+    chunk = []
+    events = queryset.only(*FIELDS).order_by('start_date', 'pk').iterator(chunk_size=CHUNK_SIZE)
+    for event in events:
+        chunk.append(vevent(event, request, domain))
+        if len(chunk) == CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append('END:VCALENDAR\r\n')
+    yield ''.join(chunk)
+
+
+def feed_response(request, queryset, name, filename, scope, private=False):
+    """
+    Odpowiedź z kanałem dla wydarzeń z `queryset`. `scope` odróżnia kanały
+    o tym samym zbiorze wydarzeń (np. zawiera wersję danych użytkownika).
+    """
+    # Pusty order_by - agregat bez zbędnego sortowania z Meta.ordering
+    state = queryset.order_by().aggregate(updated_at=Max('updated_at'), count=Count('pk'))
+    digest = hashlib.md5(
+        f'{scope}:{name}:{state["count"]}:{state["updated_at"]}:{request.get_host()}'.encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    etag = f'"{digest}"'
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if state['count'] <= settings.ICAL_FEED_CACHE_MAX_EVENTS:
+            key = f'eventhub:ical:{digest}'
+            content = cache.get(key)
+            if content is None:
+                content = ''.join(generate(queryset, request, name))
+                cache.set(key, content, settings.ICAL_FEED_CACHE_TIMEOUT)
+            response = HttpResponse(content, content_type=CONTENT_TYPE)
+        else:
+            response = StreamingHttpResponse(
+                streaming_content(request, generate(queryset, request, name)), content_type=CONTENT_TYPE,
+            )
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache' if private else f'public, max-age={settings.ICAL_FEED_MAX_AGE}'
+    return response
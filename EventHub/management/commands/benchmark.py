@@ -0,0 +1,228 @@
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count, F, Q
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from EventHub.models import Category, Event
+from SWBO_Project.metrics import percentile
+from SWBO_Project.middleware import QueryCollector
+
+READ_SCENARIOS = ['event-list', 'event-detail', 'my-events']
+WRITE_SCENARIOS = ['event-participate', 'add-comment', 'login']
+LOGIN_USERNAME = 'benchmark-login'
+LOGIN_PASSWORD = 'benchmark-login-haslo'
+
+
+class Command(BaseCommand):
+    help = (
+        'Mierzy przepustowość, opóźnienia p50/p99 i liczbę zapytań kluczowych widoków '
+        '(klient testowy Django). Raport JSON można porównywać między commitami.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Liczba żądań na wariant scenariusza.')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--scenario', action='append', choices=READ_SCENARIOS + WRITE_SCENARIOS,
+                            help='Uruchom tylko wybrane scenariusze (można powtórzyć).')
+        parser.add_argument('--read-only', action='store_true', help='Pomija scenariusze zapisujące dane.')
+        parser.add_argument('--output', help='Plik wynikowy JSON (domyślnie standardowe wyjście).')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--reconnect', action='store_true',
+                            help='Zamyka połączenia z bazą po każdym żądaniu (jak CONN_MAX_AGE=0 bez puli) '
+                                 '- do porównania z połączeniami trwałymi.')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.iterations = options['iterations']
+        self.warmup = options['warmup']
+        self.reconnect = options['reconnect']
+
+        scenarios = options['scenario'] or READ_SCENARIOS + ([] if options['read_only'] else WRITE_SCENARIOS)
+        if options['read_only']:
+            scenarios = [name for name in scenarios if name in READ_SCENARIOS]
+
+        self.prepare()
+        results = {}
+        for name in scenarios:
+            for variant, requests in getattr(self, f'scenario_{name.replace("-", "_")}')():
+                key = f'{name} {variant}'.strip()
+                results[key] = self.measure(requests)
+                self.stderr.write(
+                    f'{key:<45} {results[key]["throughput_rps"]:>8.1f} req/s  '
+                    f'p50 {results[key]["p50_ms"]:>7.2f} ms  p99 {results[key]["p99_ms"]:>7.2f} ms  '
+                    f'zapytania {results[key]["queries_p50"]}'
+                )
+
+        report = {'meta': self.meta(), 'scenarios': results}
+        output = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def prepare(self):
+        published = Event.objects.filter(status='published')
+        self.popular_event = published.order_by('-participants_count').first()
+        if self.popular_event is None:
+            raise CommandError('Brak opublikowanych wydarzeń - najpierw uruchom seed_data.')
+        self.event_ids = list(published.order_by('?').values_list('pk', flat=True)[:200])
+        self.category = Category.objects.order_by('pk').first()
+        self.search_term = self.popular_event.title.split()[0]
+        self.user = (
+            User.objects.annotate(total=Count('events_participating'))
+            .order_by('-total').first()
+        )
+        # Zapis/wypis tylko tam, gdzie użytkownik nie jest ani uczestnikiem, ani na liście
+        # rezerwowej, a miejsca są wolne - wtedy wypis cofa dokładnie to, co zrobił zapis
+        self.participate_event_ids = list(
+            published.exclude(participants=self.user).exclude(waitlist__user=self.user)
+            .filter(Q(max_participants=0) | Q(participants_count__lt=F('max_participants')))
+            .order_by('?').values_list('pk', flat=True)[:200]
+        )
+
+        hosts = [host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')]
+        self.client = Client(HTTP_HOST=hosts[0] if hosts else 'localhost')
+        self.auth_client = Client(HTTP_HOST=hosts[0] if hosts else 'localhost')
+        self.auth_client.force_login(self.user)
+
+    def meta(self):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': sys.version.split()[0],
+            'iterations': self.iterations,
+            'connections': {
+                'reconnect': self.reconnect,
+                'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+                'pool': bool(connection.settings_dict['OPTIONS'].get('pool')),
+            },
+            'dataset': {
+                'events': Event.objects.count(),
+                'users': User.objects.count(),
+            },
+        }
+
+    def measure(self, requests):
+        durations, query_counts, errors = [], [], 0
+        for index in range(self.warmup + self.iterations):
+            collector = QueryCollector()
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(collector))
+                if self.reconnect:
+                    # Klient testowy nie zamyka połączeń - żądanie zaczyna się od nawiązania nowego
+                    connections.close_all()
+                start = time.perf_counter()
+                response = requests(index)
+                elapsed = time.perf_counter() - start
+            if index < self.warmup:
+                continue
+            durations.append(elapsed * 1000)
+            query_counts.append(collector.count)
+            errors += response.status_code >= 400
+
+        total_seconds = sum(durations) / 1000
+        durations.sort()
+        query_counts.sort()
+        return {
+            'requests': len(durations),
+            'errors': errors,
+            'throughput_rps': round(len(durations) / total_seconds, 2) if total_seconds else None,
+            'mean_ms': round(statistics.fmean(durations), 3),
+            'p50_ms': round(percentile(durations, 0.50), 3),
+            'p99_ms': round(percentile(durations, 0.99), 3),
+            'queries_p50': percentile(query_counts, 0.50),
+            'queries_max': query_counts[-1],
+        }
+
+    def random_event(self):
+        return self.random.choice(self.event_ids)
+
+    def scenario_event_list(self):
+        url = reverse('event-list')
+        variants = {
+            '': {},
+            '?page=deep': {'page': 50},
+            '?search': {'search': self.search_term},
+            '?sort=title': {'sort': 'title'},
+            '?sort=-participants_count': {'sort': '-participants_count'},
+        }
+        if self.category is not None:
+            variants['?category'] = {'category': self.category.pk}
+            variants['?category&search&sort'] = {
+                'category': self.category.pk, 'search': self.search_term, 'sort': 'start_date',
+            }
+        for variant, params in variants.items():
+            yield variant, lambda index, params=params: self.client.get(url, params)
+
+    def scenario_event_detail(self):
+        popular = reverse('event-detail', args=[self.popular_event.pk])
+        yield 'popular', lambda index: self.client.get(popular)
+        yield 'random', lambda index: self.client.get(reverse('event-detail', args=[self.random_event()]))
+
+    def scenario_my_events(self):
+        url = reverse('my-events')
+        yield '', lambda index: self.auth_client.get(url)
+
+    def scenario_event_participate(self):
+        # Na przemian zapis i wypis w wydarzeniach spoza udziałów użytkownika
+        # (zob. prepare) - stan bazy po pomiarze się nie zmienia
+        if not self.participate_event_ids:
+            self.stderr.write('event-participate: brak wydarzeń z wolnymi miejscami poza udziałami użytkownika')
+            return
+
+        def toggle(index):
+            event_id = self.participate_event_ids[(index // 2) % len(self.participate_event_ids)]
+            action = 'join' if index % 2 == 0 else 'leave'
+            return self.auth_client.post(reverse('event-participate', args=[event_id]), {'action': action})
+        yield '', toggle
+        # Nieparzysta liczba żądań kończy się zapisem - cofany jednym wypisem poza pomiarem
+        if (self.warmup + self.iterations) % 2:
+            toggle(self.warmup + self.iterations)
+
+    def scenario_add_comment(self):
+        def comment(index):
+            return self.auth_client.post(
+                reverse('add-comment', args=[self.random_event()]), {'content': f'Komentarz testowy {index}'}
+            )
+        yield '', comment
+
+    def scenario_login(self):
+        """
+        Logowanie formularzem (zapis last_login, nowa sesja). Wariant fast-hash
+        używa taniego hashera haseł, żeby czas PBKDF2 nie zasłaniał kosztu
+        zapytań do tabel użytkowników.
+        """
+        user, _ = User.objects.get_or_create(username=LOGIN_USERNAME)
+        client = Client(HTTP_HOST=self.client.defaults['HTTP_HOST'])
+        url = reverse('login')
+
+        def log_in(index):
+            return client.post(url, {'username': LOGIN_USERNAME, 'password': LOGIN_PASSWORD})
+
+        for variant, hashers in [('', None), ('fast-hash', ['django.contrib.auth.hashers.MD5PasswordHasher'])]:
+            # Generator jest wstrzymany na yield w czasie pomiaru - ustawienia obowiązują do jego końca
+            with override_settings(PASSWORD_HASHERS=hashers) if hashers else ExitStack():
+                user.set_password(LOGIN_PASSWORD)
+                User.objects.filter(pk=user.pk).update(password=user.password)
+                yield variant, log_in
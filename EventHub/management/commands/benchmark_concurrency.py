@@ -0,0 +1,215 @@
+import asyncio
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from SWBO_Project.metrics import percentile
+
+SERVERS = {
+    'wsgi': ('gunicorn', 'gunicorn (synchroniczne workery)'),
+    'asgi': ('uvicorn', 'uvicorn (widoki asynchroniczne)'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Porównuje wdrożenie WSGI (gunicorn) i ASGI (uvicorn) pod obciążeniem: uruchamia serwer '
+        'na lokalnym porcie, otwiera wiele wolnych połączeń przesyłających nagłówki po kawałku '
+        'i jednocześnie mierzy przepustowość oraz p50/p99 zwykłych klientów.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', choices=list(SERVERS),
+                            help='Mierzony serwer (można powtórzyć; domyślnie oba).')
+        parser.add_argument('--workers', type=int, default=3, help='Liczba procesów serwera.')
+        parser.add_argument('--clients', type=int, default=20, help='Równoległi zwykli klienci.')
+        parser.add_argument('--slow-clients', type=int, default=50,
+                            help='Połączenia wysyłające nagłówki po jednym co --slow-interval sekund.')
+        parser.add_argument('--slow-interval', type=float, default=1.0)
+        parser.add_argument('--duration', type=float, default=10.0, help='Czas pomiaru w sekundach.')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Limit czasu pojedynczego żądania.')
+        parser.add_argument('--path', action='append', help='Mierzone ścieżki (domyślnie /).')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--output', help='Plik wynikowy JSON (domyślnie standardowe wyjście).')
+
+    def handle(self, *args, **options):
+        self.options = options
+        hosts = [host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')]
+        self.host_header = hosts[0] if hosts else 'localhost'
+        paths = options['path'] or ['/']
+
+        results = {}
+        for mode in options['mode'] or list(SERVERS):
+            module, label = SERVERS[mode]
+            if importlib.util.find_spec(module) is None:
+                raise CommandError(f'Brak pakietu {module} - zainstaluj zależności z requirements.txt.')
+            with self.server(mode):
+                results[mode] = asyncio.run(self.run_load(paths))
+            self.stderr.write(
+                f'{label:<35} {results[mode]["throughput_rps"]:>8.1f} req/s  '
+                f'p50 {results[mode]["p50_ms"] or 0:>8.2f} ms  p99 {results[mode]["p99_ms"] or 0:>8.2f} ms  '
+                f'błędy {results[mode]["errors"]}  wolne połączenia {results[mode]["slow_connections"]}'
+            )
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'python': sys.version.split()[0],
+                'workers': options['workers'],
+                'clients': options['clients'],
+                'slow_clients': options['slow_clients'],
+                'slow_interval': options['slow_interval'],
+                'duration': options['duration'],
+                'paths': paths,
+            },
+            'servers': results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def server_command(self, mode):
+        port, workers = str(self.options['port']), str(self.options['workers'])
+        if mode == 'wsgi':
+            # Timeout workera dłuższy niż pomiar - gunicorn nie zrywa wolnych połączeń
+            timeout = str(int(self.options['duration'] * 2) + 30)
+            return [
+                sys.executable, '-m', 'gunicorn', 'SWBO_Project.wsgi:application',
+                '--bind', f'127.0.0.1:{port}', '--workers', workers, '--timeout', timeout, '--log-level', 'warning',
+            ]
+        return [
+            sys.executable, '-m', 'uvicorn', 'SWBO_Project.asgi:application',
+            '--host', '127.0.0.1', '--port', port, '--workers', workers, '--lifespan', 'off', '--log-level', 'warning',
+        ]
+
+    def server(self, mode):
+        command = self.server_command(mode)
+        env = {**os.environ, 'DJANGO_ASYNC_VIEWS': '1' if mode == 'asgi' else '0'}
+        process = subprocess.Popen(command, env=env, cwd=settings.BASE_DIR)
+        return RunningServer(process, self.options['port'])
+
+    async def run_load(self, paths):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.options['duration']
+        stats = {'latencies': [], 'statuses': Counter(), 'errors': 0, 'slow_connections': 0}
+
+        slow = [asyncio.create_task(self.slow_client(deadline, stats)) for _ in range(self.options['slow_clients'])]
+        # Wolne połączenia zajmują serwer, zanim ruszą zwykli klienci
+        await asyncio.sleep(min(1.0, self.options['duration'] / 4))
+        started = loop.time()
+        await asyncio.gather(*(
+            self.client(paths[index % len(paths)], deadline, stats) for index in range(self.options['clients'])
+        ))
+        elapsed = loop.time() - started
+        for task in slow:
+            task.cancel()
+        await asyncio.gather(*slow, return_exceptions=True)
+
+        latencies = sorted(stats['latencies'])
+        return {
+            'requests': len(latencies),
+            'errors': stats['errors'],
+            'statuses': {str(status): count for status, count in sorted(stats['statuses'].items())},
+            'slow_connections': stats['slow_connections'],
+            'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+            'p50_ms': round(percentile(latencies, 0.50), 3) if latencies else None,
+            'p99_ms': round(percentile(latencies, 0.99), 3) if latencies else None,
+        }
+
+    async def client(self, path, deadline, stats):
+        loop = asyncio.get_running_loop()
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: {self.host_header}\r\nConnection: close\r\n\r\n'
+        ).encode()
+        while loop.time() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(self.fetch(request), self.options['timeout'])
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                stats['errors'] += 1
+                continue
+            stats['latencies'].append((time.perf_counter() - start) * 1000)
+            stats['statuses'][status] += 1
+            stats['errors'] += status >= 500
+
+    async def fetch(self, request):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.options['port'])
+        try:
+            writer.write(request)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            # Odpowiedź do końca - Connection: close
+            while await reader.read(65536):
+                pass
+            return status
+        finally:
+            writer.close()
+
+    async def slow_client(self, deadline, stats):
+        """
+        Połączenie jak od klienta na wolnym łączu: nagłówki po jednym, bez końca żądania.
+        """
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            try:
+                reader, writer = await asyncio.open_connection('127.0.0.1', self.options['port'])
+            except OSError:
+                await asyncio.sleep(self.options['slow_interval'])
+                continue
+            stats['slow_connections'] += 1
+            try:
+                writer.write(f'GET / HTTP/1.1\r\nHost: {self.host_header}\r\n'.encode())
+                index = 0
+                while loop.time() < deadline:
+                    await asyncio.sleep(self.options['slow_interval'])
+                    writer.write(f'X-Slow-{index}: 1\r\n'.encode())
+                    await writer.drain()
+                    index += 1
+            except OSError:
+                # Serwer zamknął połączenie - otwieramy kolejne
+                pass
+            finally:
+                writer.close()
+
+
+class RunningServer:
+    def __init__(self, process, port, startup_timeout=30):
+        self.process = process
+        self.port = port
+        self.startup_timeout = startup_timeout
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError(f'Serwer zakończył działanie z kodem {self.process.returncode}.')
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise CommandError(f'Serwer nie nasłuchuje na porcie {self.port}.')
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
@@ -0,0 +1,141 @@
+import os
+import time
+from datetime import datetime
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from EventHub.models import EventAttachment, FileTombstone
+from EventHub.storage import BLOB_PREFIX
+
+# Katalogi pod MEDIA_ROOT należące do załączników (stary układ po dacie i bloby)
+ATTACHMENT_DIRS = [BLOB_PREFIX, 'event_attachments']
+TEMP_PREFIX = '.upload-'
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Usuwa pliki załączników, na które nie wskazuje już żaden EventAttachment: '
+        'najpierw z nagrobków zapisanych przy usuwaniu, opcjonalnie także osierocone pliki pod MEDIA_ROOT.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Tylko raportuje, nic nie usuwa.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Liczba plików sprawdzanych jednym zapytaniem.')
+        parser.add_argument('--orphans', action='store_true',
+                            help='Przeszukuje MEDIA_ROOT w poszukiwaniu plików bez wiersza w bazie.')
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help='Pomija osierocone pliki młodsze niż podana liczba sekund (trwające wysyłanie).')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        self.batch_size = options['batch_size']
+        self.storage = EventAttachment._meta.get_field('file').storage
+        self.root = os.path.abspath(self.storage.location)
+        self.directories = set()
+        self.removed = self.freed = self.failed = 0
+
+        started = time.perf_counter()
+        self.collect_tombstones()
+        if options['orphans']:
+            self.collect_orphans(time.time() - options['min_age'])
+        if not self.dry_run:
+            self.remove_empty_directories()
+
+        elapsed = time.perf_counter() - started
+        rate = self.removed / elapsed if elapsed else self.removed
+        verb = 'Do usunięcia' if self.dry_run else 'Usunięto'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} plików: {self.removed} ({self.freed / 1024 / 1024:.1f} MB) w {elapsed:.1f} s '
+            f'({rate:,.0f} plików/s), błędy: {self.failed}'
+        ))
+
+    def unreferenced(self, names):
+        referenced = set(EventAttachment.objects.filter(file__in=names).values_list('file', flat=True))
+        return [name for name in names if name not in referenced]
+
+    def collect_tombstones(self):
+        last_pk = 0
+        while True:
+            batch = list(
+                FileTombstone.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'name', 'deleted_at')[:self.batch_size]
+            )
+            if not batch:
+                return
+            last_pk = batch[-1][0]
+            deleted_at = {name: when for _, name, when in batch}
+
+            for name in self.unreferenced(list(deleted_at)):
+                # Ten sam blob wgrany ponownie po usunięciu ma świeży mtime - zostaje
+                self.remove(name, not_after=deleted_at[name].timestamp())
+            if not self.dry_run:
+                FileTombstone.objects.filter(pk__in=[pk for pk, _, _ in batch]).delete()
+
+    def attachment_files(self, cutoff):
+        for directory in ATTACHMENT_DIRS:
+            for dirpath, _, filenames in os.walk(os.path.join(self.root, directory)):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        if os.path.getmtime(path) > cutoff:
+                            continue
+                    except OSError:
+                        continue
+                    yield os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def collect_orphans(self, cutoff):
+        # Porzucone pliki tymczasowe przerwanych wysyłań
+        for entry in os.scandir(self.root) if os.path.isdir(self.root) else []:
+            if entry.is_file() and entry.name.startswith(TEMP_PREFIX) and entry.stat().st_mtime <= cutoff:
+                self.remove(entry.name)
+
+        for names in batched(self.attachment_files(cutoff), self.batch_size):
+            for name in self.unreferenced(names):
+                self.remove(name)
+
+    def remove(self, name, not_after=None):
+        path = self.storage.path(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        if not_after is not None and stat.st_mtime > not_after:
+            return
+
+        if self.verbosity > 1:
+            modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.get_current_timezone())
+            self.stdout.write(f'  {name} ({stat.st_size} B, {modified:%Y-%m-%d %H:%M})')
+        if not self.dry_run:
+            try:
+                os.remove(path)
+            except OSError as error:
+                self.failed += 1
+                self.stderr.write(f'Nie udało się usunąć {name}: {error}')
+                return
+            self.directories.add(os.path.dirname(path))
+        self.removed += 1
+        self.freed += stat.st_size
+
+    def remove_empty_directories(self):
+        # Od najgłębszych, żeby opróżnione podkatalogi zwalniały rodziców
+        pending = sorted(self.directories, key=len, reverse=True)
+        seen = set()
+        for directory in pending:
+            while directory.startswith(self.root + os.sep) and directory not in seen:
+                seen.add(directory)
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    # Katalog niepusty albo już usunięty
+                    break
+                directory = os.path.dirname(directory)
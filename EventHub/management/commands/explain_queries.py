@@ -0,0 +1,91 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+
+from EventHub.models import Category, Comment, Event, Participation
+from EventHub.views import EventListView
+
+INDEX_PATTERNS = {
+    'postgresql': re.compile(r'(?:Index Only Scan|Index Scan|Bitmap Index Scan)(?: Backward)? (?:using|on) (\w+)'),
+    'sqlite': re.compile(r'USING (?:COVERING )?INDEX (\w+)|USING (INTEGER PRIMARY KEY)'),
+}
+FULL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on "?(\w+)"?'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?!\w| USING| VIRTUAL TABLE INDEX)'),
+}
+SORT_PATTERNS = {
+    'postgresql': re.compile(r'^\s*(?:->\s*)?Sort\b', re.MULTILINE),
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Uruchamia EXPLAIN dla zapytań wykonywanych przez widoki i raportuje, czy baza używa indeksów. '
+        'Wyniki mają sens na danych o realistycznej wielkości.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help='EXPLAIN ANALYZE (tylko PostgreSQL) - faktycznie wykonuje zapytania.')
+        parser.add_argument('--show-plans', action='store_true', help='Wypisuje pełne plany zapytań.')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in INDEX_PATTERNS:
+            raise CommandError(f'Nieobsługiwana baza danych: {vendor}')
+
+        event = Event.objects.filter(status='published').order_by('-participants_count').first()
+        category = Category.objects.first()
+        user = User.objects.order_by('pk').first()
+        if event is None or user is None:
+            raise CommandError('Brak danych - najpierw zasil bazę wydarzeniami i użytkownikami.')
+
+        explain_options = {'analyze': True} if options['analyze'] and vendor == 'postgresql' else {}
+        missing_index = 0
+
+        for name, queryset in self.view_queries(event, category, user):
+            plan = queryset.explain(**explain_options)
+            indexes = self.used_indexes(INDEX_PATTERNS[vendor], plan)
+            full_scans = sorted(set(FULL_SCAN_PATTERNS[vendor].findall(plan)))
+            sorts = bool(SORT_PATTERNS[vendor].search(plan))
+
+            style = self.style.SUCCESS if indexes and not full_scans else self.style.WARNING
+            if not indexes:
+                missing_index += 1
+            self.stdout.write(style(
+                f'{name:<40} indeksy: {", ".join(indexes) or "-"}'
+                f' | pełne skany: {", ".join(full_scans) or "-"}'
+                f' | sortowanie: {"tak" if sorts else "nie"}'
+            ))
+            if options['show_plans']:
+                self.stdout.write(plan + '\n')
+
+        if missing_index:
+            self.stdout.write(self.style.WARNING(f'Zapytania bez użycia indeksu: {missing_index}'))
+
+    def used_indexes(self, pattern, plan):
+        found = set()
+        for match in pattern.finditer(plan):
+            found.update(group for group in match.groups() if group)
+        return sorted(found)
+
+    def list_queryset(self, **params):
+        view = EventListView()
+        view.setup(RequestFactory().get('/', params))
+        return view.get_queryset()[:view.paginate_by]
+
+    def view_queries(self, event, category, user):
+        yield 'event-list', self.list_queryset()
+        if category is not None:
+            yield 'event-list ?category', self.list_queryset(category=category.pk)
+        yield 'event-list ?sort=title', self.list_queryset(sort='title')
+        yield 'event-list ?search', self.list_queryset(search=event.title.split()[0])
+        yield 'event-detail participants', event.participants.only('username').order_by('participation__registered_at')
+        yield 'event-detail comments', Comment.objects.filter(event=event).select_related('author')[:20]
+        yield 'event-participate', Participation.objects.filter(event=event, user=user)
+        yield 'my-events organized', Event.objects.filter(organizer=user).order_by('-start_date')
+        yield 'my-events participating', Event.objects.filter(participants=user).order_by('-start_date')
@@ -0,0 +1,69 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from EventHub.models import Event
+
+from .import_events import COLUMNS
+
+# Kolumny pliku -> pola zapytania (nazwy zamiast kluczy, żeby plik dało się zaimportować gdzie indziej)
+LOOKUPS = {'category': 'category__name', 'organizer': 'organizer__username'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Eksportuje wydarzenia do CSV lub JSONL w formacie import_events. Wiersze są czytane '
+        'kursorem po chunk-size naraz, więc zużycie pamięci nie zależy od wielkości tabeli.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+        parser.add_argument('--output', help='Plik wynikowy (domyślnie standardowe wyjście).')
+        parser.add_argument('--status', action='append', choices=[value for value, _ in Event.STATUS_CHOICES],
+                            help='Tylko wydarzenia o podanym statusie (można powtórzyć).')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Liczba wierszy pobieranych z bazy naraz.')
+
+    def handle(self, *args, **options):
+        queryset = Event.objects.all()
+        if options['status']:
+            queryset = queryset.filter(status__in=options['status'])
+        # Kolejność klucza głównego - bez sortowania całej tabeli po dacie
+        rows = queryset.order_by('pk').values_list(
+            *(LOOKUPS.get(column, column) for column in COLUMNS)
+        ).iterator(chunk_size=options['chunk_size'])
+
+        started = time.perf_counter()
+        if options['output']:
+            try:
+                handle = open(options['output'], 'w', encoding='utf-8', newline='')
+            except OSError as error:
+                raise CommandError(f'Nie można zapisać {options["output"]}: {error}')
+        else:
+            handle = self.stdout
+        try:
+            total = self.write(handle, rows, options['format'])
+        finally:
+            if handle is not self.stdout:
+                handle.close()
+
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else total
+        self.stderr.write(f'Wyeksportowano wydarzeń: {total} w {elapsed:.1f} s ({rate:,.0f}/s)')
+
+    def write(self, handle, rows, file_format):
+        total = 0
+        if file_format == 'csv':
+            writer = csv.writer(handle, lineterminator='\n')
+            writer.writerow(COLUMNS)
+            for row in rows:
+                writer.writerow(value.isoformat() if hasattr(value, 'isoformat') else value for value in row)
+                total += 1
+        else:
+            for row in rows:
+                record = dict(zip(COLUMNS, row))
+                handle.write(json.dumps(record, default=lambda value: value.isoformat(), ensure_ascii=False) + '\n')
+                total += 1
+        return total
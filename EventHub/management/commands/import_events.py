@@ -0,0 +1,205 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from EventHub import categories
+from EventHub.caching import bump_dashboard_version
+from EventHub.models import Event
+
+# Kolumny pliku - te same zapisuje export_events
+COLUMNS = [
+    'title', 'short_description', 'description', 'location', 'start_date', 'end_date',
+    'category', 'organizer', 'max_participants', 'status',
+]
+REQUIRED = ['title', 'short_description', 'description', 'location', 'start_date', 'end_date', 'organizer']
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Importuje wydarzenia z pliku CSV lub JSONL (kolumny jak w export_events). Plik jest czytany '
+        'strumieniowo, walidowany i zapisywany partiami przez bulk_create, a w PostgreSQL przez COPY.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Plik wejściowy albo - dla standardowego wejścia.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Format pliku (domyślnie według rozszerzenia, csv dla -).')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Liczba wierszy walidowanych i zapisywanych naraz.')
+        parser.add_argument('--method', choices=['auto', 'bulk', 'copy'], default='auto',
+                            help='Sposób zapisu: COPY (tylko PostgreSQL z psycopg 3) albo bulk_create.')
+        parser.add_argument('--status', choices=[value for value, _ in Event.STATUS_CHOICES], default='draft',
+                            help='Status wierszy bez kolumny status.')
+        parser.add_argument('--dry-run', action='store_true', help='Tylko walidacja, nic nie zapisuje.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        self.default_status = options['status']
+        self.dry_run = options['dry_run']
+        self.method = self.resolve_method(options['method'])
+        self.timezone = timezone.get_current_timezone()
+
+        # Mapy nazw na klucze: kategorie z rejestru, organizatorzy dociągani partiami
+        self.category_ids = {category.name.casefold(): category.pk for category in categories.get_categories()}
+        self.organizer_ids = {}
+
+        self.imported = self.invalid = 0
+        organizers = set()
+        started = time.perf_counter()
+        handle = sys.stdin if path == '-' else self.open(path)
+        try:
+            rows = self.read_csv(handle) if file_format == 'csv' else self.read_jsonl(handle)
+            for batch in batched(rows, options['batch_size']):
+                events = self.build(batch)
+                if events and not self.dry_run:
+                    with transaction.atomic():
+                        self.insert(events)
+                        # Zapis zbiorczy omija sygnały - panele organizatorów unieważniamy ręcznie
+                        for organizer_id in {event.organizer_id for event in events} - organizers:
+                            bump_dashboard_version(organizer_id)
+                    organizers.update(event.organizer_id for event in events)
+                self.imported += len(events)
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+        elapsed = time.perf_counter() - started
+        rate = self.imported / elapsed if elapsed else self.imported
+        verb = 'Poprawnych' if self.dry_run else 'Zaimportowano'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} wydarzeń: {self.imported} w {elapsed:.1f} s ({rate:,.0f}/s, {self.method}), '
+            f'błędnych wierszy: {self.invalid}'
+        ))
+
+    def open(self, path):
+        try:
+            # utf-8-sig - pliki z Excela zaczynają się od BOM
+            return open(path, encoding='utf-8-sig', newline='')
+        except OSError as error:
+            raise CommandError(f'Nie można otworzyć {path}: {error}')
+
+    def resolve_method(self, method):
+        copy_available = connection.vendor == 'postgresql' and connection.Database.__name__ == 'psycopg'
+        if method == 'copy' and not copy_available:
+            raise CommandError('COPY wymaga PostgreSQL i sterownika psycopg 3.')
+        if method == 'auto':
+            return 'copy' if copy_available else 'bulk'
+        return method
+
+    def read_csv(self, handle):
+        reader = csv.DictReader(handle)
+        for row in reader:
+            yield reader.line_num, row
+
+    def read_jsonl(self, handle):
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                row = {'__error__': f'niepoprawny JSON ({error})'}
+            yield line_number, row if isinstance(row, dict) else {'__error__': 'oczekiwano obiektu JSON'}
+
+    def error(self, line_number, message):
+        self.invalid += 1
+        self.stderr.write(f'Wiersz {line_number}: {message}')
+
+    def build(self, batch):
+        # Nieznani jeszcze organizatorzy całej partii - jednym zapytaniem
+        usernames = {str(row.get('organizer') or '').strip() for _, row in batch} - self.organizer_ids.keys()
+        usernames.discard('')
+        if usernames:
+            found = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+            self.organizer_ids.update({username: found.get(username) for username in usernames})
+
+        events = []
+        for line_number, row in batch:
+            try:
+                events.append(self.build_event(row))
+            except ValidationError as error:
+                self.error(line_number, '; '.join(
+                    f'{field}: {" ".join(messages)}' for field, messages in error.message_dict.items()
+                ) if hasattr(error, 'error_dict') else ' '.join(error.messages))
+        return events
+
+    def build_event(self, row):
+        if '__error__' in row:
+            raise ValidationError(row['__error__'])
+        values = {column: '' if row.get(column) is None else str(row[column]).strip() for column in COLUMNS}
+        missing = [column for column in REQUIRED if not values[column]]
+        if missing:
+            raise ValidationError(f'brak wartości: {", ".join(missing)}')
+
+        errors = {}
+        organizer_id = self.organizer_ids.get(values['organizer'])
+        if organizer_id is None:
+            errors['organizer'] = [f'nieznany użytkownik "{values["organizer"]}"']
+        category_id = None
+        if values['category']:
+            category_id = self.category_ids.get(values['category'].casefold())
+            if category_id is None:
+                errors['category'] = [f'nieznana kategoria "{values["category"]}"']
+        dates = {}
+        for column in ('start_date', 'end_date'):
+            try:
+                value = parse_datetime(values[column])
+            except ValueError:
+                value = None
+            if value is None:
+                errors[column] = ['niepoprawna data (oczekiwano ISO 8601)']
+            elif timezone.is_naive(value):
+                value = timezone.make_aware(value, self.timezone)
+            dates[column] = value
+        if errors:
+            raise ValidationError(errors)
+        if dates['end_date'] < dates['start_date']:
+            raise ValidationError({'end_date': ['koniec przed rozpoczęciem']})
+
+        event = Event(
+            title=values['title'],
+            short_description=values['short_description'],
+            description=values['description'],
+            location=values['location'],
+            start_date=dates['start_date'],
+            end_date=dates['end_date'],
+            category_id=category_id,
+            organizer_id=organizer_id,
+            max_participants=values['max_participants'] or 0,
+            status=values['status'] or self.default_status,
+        )
+        # Walidacja pól bez zapytań - klucze obce sprawdzone już przez mapy
+        event.full_clean(exclude=['category', 'organizer'], validate_unique=False, validate_constraints=False)
+        return event
+
+    def insert(self, events):
+        if self.method == 'bulk':
+            Event.objects.bulk_create(events)
+            return
+
+        fields = [field for field in Event._meta.concrete_fields if field is not Event._meta.pk]
+        table = connection.ops.quote_name(Event._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            # Kolumna search_vector jest generowana przez bazę - poza listą kolumn
+            with cursor.cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+                for event in events:
+                    copy.write_row([
+                        field.get_db_prep_save(field.pre_save(event, add=True), connection) for field in fields
+                    ])
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from EventHub.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = 'Odtwarza indeks wyszukiwania pełnotekstowego wydarzeń (kolumnę tsvector lub tabelę FTS5).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        install_search_index(connection)
+        self.stdout.write(self.style.SUCCESS(f'Indeks wyszukiwania odbudowany ({connection.vendor}).'))
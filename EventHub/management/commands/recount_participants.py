@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from EventHub.models import Event, Participation
+
+
+def actual_participants_count():
+    """
+    Podzapytanie zwracające rzeczywistą liczbę uczestników wydarzenia.
+    """
+    counts = (
+        Participation.objects.filter(event=OuterRef('pk'))
+        .order_by()
+        .values('event')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = 'Przelicza Event.participants_count i naprawia rozbieżności z tabelą Participation.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Tylko raportuje rozbieżności, bez zapisu.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Liczba wydarzeń naprawianych w jednej transakcji.')
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Event.objects.annotate(actual=actual_participants_count())
+            .exclude(participants_count=F('actual'))
+            .order_by('pk')
+            .values_list('pk', 'participants_count', 'actual')
+        )
+
+        if options['verbosity'] > 1:
+            for pk, stored, actual in drifted:
+                self.stdout.write(f'Wydarzenie #{pk}: zapisano {stored}, faktycznie {actual}')
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Liczniki uczestników są poprawne.'))
+            return
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Rozbieżności: {len(drifted)} (dry run, bez zmian)'))
+            return
+
+        batch_size = options['batch_size']
+        pks = [pk for pk, _, _ in drifted]
+        for start in range(0, len(pks), batch_size):
+            with transaction.atomic():
+                # Przeliczenie w bazie, a nie z wartości odczytanej wyżej - odporne na równoległe zapisy
+                Event.objects.filter(pk__in=pks[start:start + batch_size]).update(
+                    participants_count=actual_participants_count()
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'Naprawiono liczniki dla {len(pks)} wydarzeń.'))
@@ -0,0 +1,173 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from EventHub import categories
+from EventHub.models import Category, Comment, Event, Participation
+from users.models import UserProfile
+
+CATEGORY_NAMES = [
+    ('Koncerty', '#e74c3c'), ('Konferencje', '#3498db'), ('Warsztaty', '#2ecc71'),
+    ('Sport', '#f39c12'), ('Wykłady', '#9b59b6'), ('Spotkania', '#1abc9c'),
+    ('Wystawy', '#34495e'), ('Festiwale', '#e67e22'),
+]
+WORDS = (
+    'jazz rock koncert warsztaty programowanie python django bieg maraton wykład historia sztuka '
+    'fotografia teatr kino festiwal nauka robotyka ekologia kuchnia taniec joga szachy gry muzyka'
+).split()
+CITIES = ['Kraków', 'Warszawa', 'Gdańsk', 'Wrocław', 'Poznań', 'Łódź', 'Lublin', 'Katowice']
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Szybko zasila bazę realistycznym zbiorem danych (bulk_create w partiach) do testów wydajności.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=10000)
+        parser.add_argument('--participations', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None, help='Ziarno generatora - powtarzalny zbiór danych.')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.run_id = uuid.UUID(int=self.random.getrandbits(128)).hex[:6]
+        self.now = timezone.now()
+
+        categories = self.seed_categories()
+        user_ids = self.seed_users(options['users'])
+        counts = self.participant_counts(options['events'], options['participations'], len(user_ids))
+        event_ids = self.seed_events(counts, user_ids, categories)
+        self.seed_participations(event_ids, counts, user_ids)
+        self.seed_comments(event_ids, counts, user_ids, options['comments'])
+
+        call_command('recount_participants', stdout=self.stdout)
+
+    def report(self, label, total, started):
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else total
+        self.stdout.write(f'{label}: {total} w {elapsed:.1f} s ({rate:,.0f}/s)')
+
+    def insert(self, model, objects, return_ids=False, **kwargs):
+        created_ids, total = [], 0
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                created = model.objects.bulk_create(batch, **kwargs)
+            total += len(created)
+            if return_ids:
+                created_ids.extend(obj.pk for obj in created)
+        return created_ids if return_ids else total
+
+    def seed_categories(self):
+        existing = list(Category.objects.values_list('pk', flat=True))
+        if existing:
+            return existing
+        created = self.insert(
+            Category, (Category(name=name, color=color) for name, color in CATEGORY_NAMES), return_ids=True
+        )
+        # bulk_create omija sygnały - rejestr kategorii trzeba unieważnić ręcznie
+        categories.invalidate()
+        return created
+
+    def seed_users(self, total):
+        started = time.perf_counter()
+        # Jeden hash dla wszystkich - haszowanie 100k haseł trwałoby dłużej niż całe zasilanie
+        password = make_password('seed-password')
+        user_ids = []
+        users = (
+            User(username=f'seed{self.run_id}_{i}', email=f'seed{self.run_id}_{i}@example.com',
+                 first_name='Jan', last_name=f'Testowy {i}', password=password)
+            for i in range(total)
+        )
+        for batch in batched(users, self.batch_size):
+            with transaction.atomic():
+                ids = [user.pk for user in User.objects.bulk_create(batch)]
+                UserProfile.objects.bulk_create(UserProfile(user_id=pk) for pk in ids)
+            user_ids.extend(ids)
+        self.report('Użytkownicy', total, started)
+        return user_ids
+
+    def participant_counts(self, events, participations, users):
+        """
+        Rozkład o długim ogonie: kilka bardzo popularnych wydarzeń, większość małych.
+        """
+        weights = [self.random.paretovariate(1.2) for _ in range(events)]
+        scale = participations / sum(weights) if weights else 0
+        return [min(users, int(weight * scale)) for weight in weights]
+
+    def seed_events(self, counts, user_ids, categories):
+        started = time.perf_counter()
+        statuses = ['published'] * 8 + ['draft', 'cancelled']
+
+        def build(i, count):
+            start = self.now + timedelta(minutes=self.random.randint(-525600, 525600))
+            words = self.random.sample(WORDS, 4)
+            return Event(
+                title=' '.join(words[:2]).capitalize() + f' #{i}',
+                short_description=' '.join(words),
+                description=' '.join(self.random.choices(WORDS, k=120)),
+                location=self.random.choice(CITIES),
+                start_date=start,
+                end_date=start + timedelta(hours=self.random.randint(1, 48)),
+                category_id=self.random.choice(categories),
+                organizer_id=self.random.choice(user_ids),
+                # Limit nigdy mniejszy niż liczba zapisanych
+                max_participants=0 if self.random.random() < 0.6 else count + self.random.randint(0, 50),
+                status=self.random.choice(statuses),
+            )
+
+        event_ids = self.insert(Event, (build(i, count) for i, count in enumerate(counts)), return_ids=True)
+        self.report('Wydarzenia', len(event_ids), started)
+        return event_ids
+
+    def seed_participations(self, event_ids, counts, user_ids):
+        started = time.perf_counter()
+
+        def build():
+            for event_id, count in zip(event_ids, counts):
+                # Ciągły blok użytkowników od losowego przesunięcia - bez duplikatów w obrębie wydarzenia
+                offset = self.random.randrange(len(user_ids))
+                for k in range(count):
+                    yield Participation(event_id=event_id, user_id=user_ids[(offset + k) % len(user_ids)])
+
+        total = self.insert(Participation, build(), ignore_conflicts=True)
+        self.report('Zapisy', total, started)
+
+    def seed_comments(self, event_ids, counts, user_ids, total):
+        started = time.perf_counter()
+        # Komentarze trafiają częściej do popularnych wydarzeń
+        cumulative, running = [], 0
+        for count in counts:
+            running += count + 1
+            cumulative.append(running)
+
+        def build():
+            remaining = total
+            while remaining:
+                size = min(remaining, self.batch_size)
+                for event_id in self.random.choices(event_ids, cum_weights=cumulative, k=size):
+                    yield Comment(
+                        event_id=event_id,
+                        author_id=self.random.choice(user_ids),
+                        content=' '.join(self.random.choices(WORDS, k=self.random.randint(5, 40))),
+                    )
+                remaining -= size
+
+        self.insert(Comment, build())
+        self.report('Komentarze', total, started)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:05
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_participants_count(apps, schema_editor):
+    Event = apps.get_model('EventHub', 'Event')
+    Participation = apps.get_model('EventHub', 'Participation')
+    db_alias = schema_editor.connection.alias
+    counts = (
+        Participation.objects.using(db_alias).filter(event=OuterRef('pk'))
+        .order_by()
+        .values('event')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Event.objects.using(db_alias).update(
+        participants_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EventHub', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='participants_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Liczba uczestników'),
+        ),
+        migrations.RunPython(populate_participants_count, migrations.RunPython.noop),
+    ]
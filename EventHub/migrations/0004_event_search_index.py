@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from EventHub.search import install_search_index, uninstall_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EventHub', '0003_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
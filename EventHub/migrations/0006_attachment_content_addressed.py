@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:26
+
+import EventHub.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EventHub', '0005_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eventattachment',
+            name='file',
+            field=models.FileField(db_index=True, storage=EventHub.storage.attachment_storage, upload_to='blobs/'),
+        ),
+    ]
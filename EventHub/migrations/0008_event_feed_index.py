@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EventHub', '0007_filetombstone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'category', 'updated_at'], name='event_status_cat_updated_idx'),
+        ),
+    ]
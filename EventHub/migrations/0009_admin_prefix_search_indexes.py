@@ -0,0 +1,20 @@
+from django.db import migrations
+
+from SWBO_Project.prefix_indexes import create_indexes
+
+# Indeksy dla wyszukiwania prefiksowego w panelu administracyjnym (__istartswith).
+# Indeks prefiksu nazwy użytkownika (auth_user) tworzy migracja users 0002.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EventHub', '0008_event_feed_index'),
+    ]
+
+    operations = [
+        create_indexes([
+            ('event_title_prefix_idx', 'EventHub_event', 'title', True),
+            ('attachment_name_prefix_idx', 'EventHub_eventattachment', 'name', True),
+        ]),
+    ]
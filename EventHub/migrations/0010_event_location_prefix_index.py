@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from SWBO_Project.prefix_indexes import create_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EventHub', '0009_admin_prefix_search_indexes'),
+    ]
+
+    operations = [
+        create_indexes([
+            ('event_location_prefix_idx', 'EventHub_event', 'location', True),
+        ]),
+    ]
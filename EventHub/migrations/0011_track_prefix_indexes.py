@@ -0,0 +1,30 @@
+from django.db import migrations
+
+from SWBO_Project.prefix_indexes import PrefixIndex
+
+# Indeksy z migracji 0009 i 0010 istnieją już w bazie - tu trafiają tylko do stanu
+# migracji, żeby przebudowa tabeli w SQLite (AlterField) tworzyła je od nowa.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EventHub', '0010_event_location_prefix_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AddIndex(
+                model_name='event',
+                index=PrefixIndex(fields=['title'], name='event_title_prefix_idx'),
+            ),
+            migrations.AddIndex(
+                model_name='event',
+                index=PrefixIndex(fields=['location'], name='event_location_prefix_idx'),
+            ),
+            migrations.AddIndex(
+                model_name='eventattachment',
+                index=PrefixIndex(fields=['name'], name='attachment_name_prefix_idx'),
+            ),
+        ]),
+    ]
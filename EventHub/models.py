@@ -1,13 +1,17 @@
-import os
-
-from django.db import models
+from django.db import connections, models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_delete
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import F
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils import timezone
+from SWBO_Project.prefix_indexes import PrefixIndex
 
-from SWBO_Project import settings
+from . import categories
+from .caching import bump_dashboard_version, bump_fragment_version
+from .search import ensure_search_index
+from .storage import attachment_storage
 
 
 class Category(models.Model):
@@ -35,12 +39,29 @@ class Event(models.Model):
     organizer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='organized_events')
     participants = models.ManyToManyField(User, through='Participation', related_name='events_participating')
     max_participants = models.PositiveIntegerField(default=0, verbose_name="Maksymalna liczba uczestników")
+    # Licznik utrzymywany przez sygnały Participation - nie edytować ręcznie
+    participants_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Liczba uczestników")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            # Lista wydarzeń: status='published' ORDER BY -start_date (+ filtr kategorii)
+            models.Index(fields=['status', '-start_date'], name='event_status_start_idx'),
+            models.Index(
+                fields=['category', '-start_date'], name='event_pub_category_start_idx',
+                condition=models.Q(status='published'),
+            ),
+            # my_events: wydarzenia organizatora
+            models.Index(fields=['organizer', '-start_date'], name='event_organizer_start_idx'),
+            # Kanały .ics: MAX(updated_at) i COUNT bez czytania tabeli
+            models.Index(fields=['status', 'category', 'updated_at'], name='event_status_cat_updated_idx'),
+            # Panel administracyjny: wyszukiwanie prefiksowe tytułu i miejsca
+            PrefixIndex(fields=['title'], name='event_title_prefix_idx'),
+            PrefixIndex(fields=['location'], name='event_location_prefix_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -54,8 +75,10 @@ class Event(models.Model):
     def available_spots(self):
         if self.max_participants == 0:
             return "Bez limitu"
-        registered = self.participants.count()
-        return self.max_participants - registered
+        return self.max_participants - self.participants_count
+
+    def is_full(self):
+        return self.max_participants > 0 and self.participants_count >= self.max_participants
 
 
 class Participation(models.Model):
@@ -66,50 +89,88 @@ class Participation(models.Model):
 
     class Meta:
         unique_together = ['user', 'event']
+        indexes = [
+            models.Index(fields=['event', 'registered_at'], name='participation_event_reg_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Zapis i aktualizacja licznika w Event w jednej transakcji
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+class WaitlistEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='waitlist')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'event']
+        # Kolejka FIFO - pk rozstrzyga remisy w obrębie tej samej chwili
+        ordering = ['created_at', 'pk']
+        indexes = [
+            models.Index(fields=['event', 'created_at'], name='waitlist_event_created_idx'),
+        ]
+
+
+@receiver(post_save, sender=Participation)
+def increment_participants_count(sender, instance, created, raw=False, **kwargs):
+    # Przy loaddata (raw) licznik pochodzi z fixture
+    if created and not raw:
+        Event.objects.filter(pk=instance.event_id).update(participants_count=F('participants_count') + 1)
+
+
+@receiver(post_delete, sender=Participation)
+def decrement_participants_count(sender, instance, **kwargs):
+    Event.objects.filter(pk=instance.event_id, participants_count__gt=0).update(
+        participants_count=F('participants_count') - 1
+    )
 
 
 class EventAttachment(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='event_attachments/%Y/%m/%d/')
+    # Ścieżka wyznaczana przez skrót treści - ten sam plik jest zapisywany raz
+    file = models.FileField(upload_to='blobs/', storage=attachment_storage, db_index=True)
     name = models.CharField(max_length=200)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            PrefixIndex(fields=['name'], name='attachment_name_prefix_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
 
-@receiver(post_delete, sender=EventAttachment)
-def delete_attachment_file(sender, instance, **kwargs):
+class FileTombstone(models.Model):
     """
-    Usuwa plik z systemu plików gdy obiekt EventAttachment jest usuwany.
+    Plik, którego wiersz EventAttachment został usunięty. Zapisywany w tej samej
+    transakcji co usunięcie; same pliki kasuje później komenda collect_attachment_files.
     """
-    if instance.file:
-        try:
-            file_path = instance.file.path
-            if os.path.isfile(file_path):
-                os.remove(file_path)
-                # Spróbuj usunąć puste katalogi
-                delete_empty_directories(file_path)
-        except Exception as e:
-            # Logowanie błędu, ale nie przerywamy działania
-            print(f"Błąd podczas usuwania pliku: {e}")
-
-
-def delete_empty_directories(file_path):
+    name = models.CharField(max_length=100, unique=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+@receiver(post_delete, sender=EventAttachment)
+def record_attachment_tombstone(sender, instance, **kwargs):
     """
-    Rekurencyjnie usuwa puste katalogi zaczynając od katalogu pliku.
+    Zamiast usuwać plik w trakcie żądania zapisuje nagrobek. Plik może być
+    współdzielony z innymi załącznikami, więc o jego usunięciu decyduje komenda.
     """
-    directory = os.path.dirname(file_path)
-
-    while directory and directory != settings.MEDIA_ROOT:
-        try:
-            if not os.listdir(directory):
-                os.rmdir(directory)
-                directory = os.path.dirname(directory)
-            else:
-                break
-        except OSError:
-            break
+    if instance.file:
+        # Ponowne usunięcie odświeża datę - blob mógł zostać w międzyczasie wgrany znowu
+        FileTombstone.objects.bulk_create(
+            [FileTombstone(name=instance.file.name)],
+            update_conflicts=True, unique_fields=['name'], update_fields=['deleted_at'],
+        )
 
 
 class Comment(models.Model):
@@ -120,4 +181,59 @@ class Comment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['event', '-created_at'], name='comment_event_created_idx'),
+        ]
+
+
+# Unieważnianie fragmentów strony wydarzenia w cache
+@receiver(post_save, sender=Participation)
+@receiver(post_delete, sender=Participation)
+def invalidate_participants_fragment(sender, instance, **kwargs):
+    bump_fragment_version(instance.event_id, 'participants')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments_fragment(sender, instance, **kwargs):
+    bump_fragment_version(instance.event_id, 'comments')
+
+
+@receiver(post_save, sender=EventAttachment)
+@receiver(post_delete, sender=EventAttachment)
+def invalidate_attachments_fragment(sender, instance, **kwargs):
+    bump_fragment_version(instance.event_id, 'attachments')
+
+
+@receiver(post_save, sender=Participation)
+@receiver(post_delete, sender=Participation)
+def invalidate_participant_dashboard(sender, instance, **kwargs):
+    bump_dashboard_version(instance.user_id)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_organizer_dashboard(sender, instance, raw=False, **kwargs):
+    # Uczestnicy zobaczą zmianę po wygaśnięciu krótkiego MY_EVENTS_CACHE_TIMEOUT
+    if not raw:
+        bump_dashboard_version(instance.organizer_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    categories.invalidate()
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using, **kwargs):
+    """
+    Przebudowa tabeli Event w SQLite (np. AlterField) usuwa triggery indeksu
+    wyszukiwania - po migracjach są odtwarzane, jeśli ich brakuje.
+    """
+    connection = connections[using]
+    if sender.label == 'EventHub' and (
+        ('EventHub', '0004_event_search_index') in MigrationRecorder(connection).applied_migrations()
+    ):
+        ensure_search_index(connection)
@@ -0,0 +1,164 @@
+"""
+Stronicowanie kursorowe (keyset) - WHERE (kolumna, pk) > (ostatnia wartość)
+zamiast OFFSET, bez COUNT(*). Koszt strony nie zależy od jej numeru.
+"""
+import base64
+import json
+from dataclasses import dataclass
+from functools import cached_property
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+
+# Poniżej tej wartości szacunku COUNT(*) jest tani - liczymy dokładnie
+EXACT_COUNT_LIMIT = 10000
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(sort, value, pk, direction):
+    payload = json.dumps([sort, value, pk, direction], default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort, value, pk, direction = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+    # Ręcznie zmieniony kursor nie może dotrzeć do filtra zapytania
+    if direction not in ('next', 'prev') or not isinstance(pk, int) or isinstance(pk, bool):
+        raise InvalidCursor(token)
+    return sort, value, pk, direction
+
+
+@dataclass
+class CursorPage:
+    object_list: list
+    next_cursor: str = None
+    previous_cursor: str = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator z liczbą elementów znaną z góry (np. z adnotacji) - bez COUNT(*).
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @property
+    def count(self):
+        return self._count
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator dla dużych tabel: w PostgreSQL liczba elementów pochodzi
+    z szacunku planera (EXPLAIN), a dokładny COUNT(*) pada tylko, gdy
+    szacunek jest mały. Numery ostatnich stron mogą być przybliżone.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            estimate = planner_estimate(queryset, connection)
+            if estimate is not None and estimate > EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+def planner_estimate(queryset, connection):
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]['Plan']['Plan Rows'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def paginate_by_cursor(queryset, sort, token, per_page):
+    """
+    Zwraca CursorPage dla zapytania posortowanego po `sort` (np. '-start_date')
+    z pk jako drugim kluczem. Kursor z innego sortowania jest ignorowany.
+    """
+    field_name = sort.lstrip('-')
+    descending = sort.startswith('-')
+    model_field = queryset.model._meta.get_field(field_name)
+    ordering = [sort, '-pk' if descending else 'pk']
+
+    direction = 'next'
+    if token:
+        cursor_sort, value, pk, direction = decode_cursor(token)
+        if cursor_sort != sort:
+            token, direction = None, 'next'
+
+    if token:
+        try:
+            value = model_field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor(token)
+        if value is None:
+            raise InvalidCursor(token)
+        forward = direction == 'next'
+        lookup = 'lt' if descending == forward else 'gt'
+        # Warunek zakresowy na samej kolumnie pozwala bazie zejść indeksem do pozycji kursora
+        queryset = queryset.filter(
+            Q(**{f'{field_name}__{lookup}e': value}),
+            Q(**{f'{field_name}__{lookup}': value}) | Q(**{f'pk__{lookup}': pk}),
+        )
+        if not forward:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if direction == 'prev':
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, bool(token)
+
+    def cursor_for(row, to):
+        # Obiekty modelu albo słowniki z .values() zawierające pk i pole sortowania
+        if isinstance(row, dict):
+            value, pk = row[field_name], row['pk']
+        else:
+            value, pk = getattr(row, field_name), row.pk
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        return encode_cursor(sort, value, pk, to)
+
+    return CursorPage(
+        object_list=rows,
+        next_cursor=cursor_for(rows[-1], 'next') if rows and has_next else None,
+        previous_cursor=cursor_for(rows[0], 'prev') if rows and has_previous else None,
+    )
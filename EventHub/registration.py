@@ -0,0 +1,124 @@
+"""
+Zapisy na wydarzenia z limitem miejsc i listą rezerwową.
+
+Każda operacja to jedna krótka transakcja: wiersz Event jest blokowany
+(SELECT ... FOR UPDATE), więc równoległe zapisy na to samo wydarzenie
+wykonują się po kolei i nie mogą przekroczyć max_participants.
+"""
+from django.db import IntegrityError, transaction
+
+from .models import Event, Participation, WaitlistEntry
+
+JOINED = 'joined'
+WAITLISTED = 'waitlisted'
+ALREADY_PARTICIPATING = 'already_participating'
+ALREADY_WAITLISTED = 'already_waitlisted'
+LEFT = 'left'
+LEFT_WAITLIST = 'left_waitlist'
+NOT_REGISTERED = 'not_registered'
+UNAVAILABLE = 'unavailable'
+
+
+def _lock_event(event_id):
+    return (
+        Event.objects.select_for_update()
+        .filter(pk=event_id)
+        .values('status', 'max_participants', 'participants_count')
+        .first()
+    )
+
+
+def _free_spots(event):
+    """
+    Liczba wolnych miejsc albo None dla wydarzeń bez limitu.
+    """
+    if event['max_participants'] == 0:
+        return None
+    return max(event['max_participants'] - event['participants_count'], 0)
+
+
+def _create_once(model, **kwargs):
+    """
+    Pojedynczy INSERT; naruszenie unique_together oznacza powtórzone żądanie.
+    """
+    try:
+        with transaction.atomic():
+            model.objects.create(**kwargs)
+    except IntegrityError:
+        return False
+    return True
+
+
+def _promote(event_id, free_spots):
+    """
+    Przenosi pierwsze `free_spots` osób z listy rezerwowej (None - wszystkie).
+    Wpisy osób, które już są uczestnikami, są pomijane i usuwane.
+    """
+    participants = Participation.objects.filter(event_id=event_id).values('user_id')
+    entries = list(
+        WaitlistEntry.objects.filter(event_id=event_id)
+        .exclude(user_id__in=participants)
+        .order_by('created_at', 'pk')
+        .values_list('user_id', flat=True)[:free_spots]
+    )
+    for user_id in entries:
+        Participation.objects.create(user_id=user_id, event_id=event_id)
+    if entries:
+        WaitlistEntry.objects.filter(event_id=event_id, user_id__in=participants).delete()
+    return entries
+
+
+def join_event(event_id, user):
+    with transaction.atomic():
+        event = _lock_event(event_id)
+        if event is None or event['status'] != 'published':
+            return UNAVAILABLE
+
+        free_spots = _free_spots(event)
+        if free_spots != 0:
+            # Zwolnione miejsca (np. po usunięciu konta) najpierw dla czekających na liście rezerwowej
+            promoted = _promote(event_id, free_spots)
+            if user.pk in promoted:
+                return JOINED
+            if free_spots is None or len(promoted) < free_spots:
+                if _create_once(Participation, user=user, event_id=event_id):
+                    WaitlistEntry.objects.filter(user=user, event_id=event_id).delete()
+                    return JOINED
+                return ALREADY_PARTICIPATING
+
+        if Participation.objects.filter(user=user, event_id=event_id).exists():
+            return ALREADY_PARTICIPATING
+        if _create_once(WaitlistEntry, user=user, event_id=event_id):
+            return WAITLISTED
+        return ALREADY_WAITLISTED
+
+
+def leave_event(event_id, user):
+    with transaction.atomic():
+        event = _lock_event(event_id)
+        if event is None:
+            return UNAVAILABLE
+
+        deleted, _ = Participation.objects.filter(user=user, event_id=event_id).delete()
+        if deleted:
+            free_spots = _free_spots({**event, 'participants_count': event['participants_count'] - 1})
+            if free_spots:
+                _promote(event_id, free_spots)
+            return LEFT
+
+        deleted, _ = WaitlistEntry.objects.filter(user=user, event_id=event_id).delete()
+        return LEFT_WAITLIST if deleted else NOT_REGISTERED
+
+
+def promote_waitlist(event_id):
+    """
+    Przenosi osoby z listy rezerwowej na zwolnione miejsca, np. po zwiększeniu limitu.
+    """
+    with transaction.atomic():
+        event = _lock_event(event_id)
+        if event is None:
+            return []
+        free_spots = _free_spots(event)
+        if free_spots == 0:
+            return []
+        return _promote(event_id, free_spots)
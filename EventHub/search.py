@@ -0,0 +1,160 @@
+"""
+Wyszukiwanie pełnotekstowe wydarzeń.
+
+PostgreSQL: generowana kolumna tsvector (title > location > description)
+z indeksem GIN. SQLite: tabela FTS5 z zawartością zewnętrzną, synchronizowana
+triggerami przy zapisie i usuwaniu Event. Oba warianty utrzymuje baza,
+więc indeks jest aktualny także po update() i usuwaniu kaskadowym.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+EVENT_TABLE = 'EventHub_event'
+FTS_TABLE = 'eventhub_event_fts'
+SQLITE_TRIGGERS = [f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au']
+# Wagi kolumn dla bm25() w kolejności z CREATE VIRTUAL TABLE (title, location, description)
+SQLITE_COLUMN_WEIGHTS = (10.0, 5.0, 1.0)
+
+POSTGRES_SETUP = [
+    f"""
+    ALTER TABLE "{EVENT_TABLE}" ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    f'CREATE INDEX IF NOT EXISTS event_search_vector_idx ON "{EVENT_TABLE}" USING GIN (search_vector)',
+]
+
+POSTGRES_TEARDOWN = [
+    'DROP INDEX IF EXISTS event_search_vector_idx',
+    f'ALTER TABLE "{EVENT_TABLE}" DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_SETUP = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, location, description,
+        content='{EVENT_TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON "{EVENT_TABLE}" BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, location, description)
+        VALUES (new.id, new.title, new.location, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON "{EVENT_TABLE}" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, location, description)
+        VALUES ('delete', old.id, old.title, old.location, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, location, description
+    ON "{EVENT_TABLE}" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, location, description)
+        VALUES ('delete', old.id, old.title, old.location, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, location, description)
+        VALUES (new.id, new.title, new.location, new.description);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_TEARDOWN = [
+    *(f'DROP TRIGGER IF EXISTS {trigger}' for trigger in SQLITE_TRIGGERS),
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def _statements(vendor, setup=True):
+    if vendor == 'postgresql':
+        return POSTGRES_SETUP if setup else POSTGRES_TEARDOWN
+    if vendor == 'sqlite':
+        return SQLITE_SETUP if setup else SQLITE_TEARDOWN
+    return []
+
+
+def install_search_index(connection):
+    """
+    Tworzy (idempotentnie) indeks wyszukiwania i odbudowuje jego zawartość.
+    Na SQLite po migracji przebudowującej tabelę Event robi to ensure_search_index(),
+    bo razem ze starą tabelą znikają triggery.
+    """
+    with connection.cursor() as cursor:
+        for statement in _statements(connection.vendor):
+            cursor.execute(statement)
+
+
+def ensure_search_index(connection):
+    """
+    Odtwarza indeks na SQLite, jeśli brakuje któregoś triggera - znikają przy
+    przebudowie tabeli Event. Wywoływane po każdym migrate (models.py).
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)", SQLITE_TRIGGERS,
+        )
+        if cursor.fetchone()[0] == len(SQLITE_TRIGGERS):
+            return
+    install_search_index(connection)
+
+
+def uninstall_search_index(connection):
+    with connection.cursor() as cursor:
+        for statement in _statements(connection.vendor, setup=False):
+            cursor.execute(statement)
+
+
+def _terms(query):
+    # Tylko znaki słowne - operatory FTS5/tsquery z wejścia użytkownika są pomijane
+    return re.findall(r'\w+', query)
+
+
+def search_events(queryset, query):
+    """
+    Filtruje wydarzenia pasujące do zapytania i dodaje adnotację search_rank
+    (większa wartość = lepsze dopasowanie). Każde słowo dopasowywane jest prefiksowo.
+    """
+    terms = _terms(query)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        tsquery = "to_tsquery('simple', %s)"
+        params = [' & '.join(f'{term}:*' for term in terms)]
+        vector = f'"{EVENT_TABLE}"."search_vector"'
+        return queryset.filter(
+            RawSQL(f'{vector} @@ {tsquery}', params, output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f'ts_rank({vector}, {tsquery})', params, output_field=FloatField())
+        )
+
+    if vendor == 'sqlite':
+        # Złączenie z tabelą FTS: jeden MATCH filtruje i daje bm25() z wagami kolumn
+        # (tytuł > miejsce > opis), więc dopasowanie i ranking zgadzają się także bez
+        # polskich znaków. Planer zaczyna od indeksu FTS i sięga do Event po kluczu.
+        # ORM nie złączy tabeli bez modelu - stąd extra(). bm25() rośnie ku gorszym
+        # dopasowaniom, więc ranking to jego odwrotność.
+        weights = ', '.join(map(str, SQLITE_COLUMN_WEIGHTS))
+        return queryset.extra(
+            select={'search_rank': f'-bm25({FTS_TABLE}, {weights})'},
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = "{EVENT_TABLE}"."id"', f'{FTS_TABLE} MATCH %s'],
+            params=[' '.join(f'"{term}"*' for term in terms)],
+        )
+
+    # Inne bazy: dotychczasowe dopasowanie bez indeksu
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(description__icontains=term) | Q(location__icontains=term)
+    return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
@@ -0,0 +1,81 @@
+"""
+Magazyn załączników adresowany treścią.
+
+Każdy plik trafia pod ścieżkę wyznaczoną przez skrót SHA-256 zawartości
+(blobs/ab/cd/<skrót>.<rozszerzenie>), więc ten sam PDF wgrany do wielu
+wydarzeń zajmuje miejsce na dysku tylko raz. Liczbą odwołań jest liczba
+wierszy EventAttachment wskazujących na dany plik - plik jest usuwany
+dopiero razem z ostatnim z nich.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs'
+
+
+def attachment_max_size():
+    return settings.ATTACHMENT_MAX_SIZE
+
+
+def blob_name(digest, extension):
+    return f'{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Zapis strumieniowy: plik jest kopiowany kawałkami do pliku tymczasowego
+    w docelowym katalogu i jednocześnie haszowany, a potem przenoszony
+    (os.replace) pod nazwę wynikającą ze skrótu. Jeśli blob już istnieje,
+    kopia tymczasowa jest usuwana, a zwracana jest nazwa istniejącego pliku.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Nazwa jest wyznaczana w _save na podstawie treści - bez sprawdzania kolizji
+        return name
+
+    def _save(self, name, content):
+        max_size = attachment_max_size()
+        extension = os.path.splitext(name)[1][:16]
+        os.makedirs(self.location, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.location, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    size += len(chunk)
+                    if max_size and size > max_size:
+                        raise ValidationError(f'Plik przekracza dopuszczalny rozmiar {max_size} B.')
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            final_name = blob_name(digest.hexdigest(), extension)
+            final_path = self.path(final_name)
+            if os.path.exists(final_path):
+                os.remove(temp_path)
+                # Świeży mtime chroni blob przed zbieraniem nieużywanych plików
+                os.utime(final_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.chmod(temp_path, self.file_permissions_mode or 0o644)
+                # Atomowe przeniesienie - równoległy zapis tego samego pliku daje ten sam wynik
+                os.replace(temp_path, final_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return final_name
+
+
+def attachment_storage():
+    return ContentAddressedStorage()
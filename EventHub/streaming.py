@@ -0,0 +1,54 @@
+"""
+Treść odpowiedzi strumieniowych dobrana do serwera.
+
+StreamingHttpResponse z synchronicznym iteratorem pod ASGI jest najpierw
+w całości zbierany do listy (sync_to_async(list)), a z asynchronicznym pod
+WSGI - tak samo, przez async_to_sync. Dlatego generatory eksportów, kanałów
+i plików pozostają synchroniczne, a pod ASGI są opakowywane w iterator
+asynchroniczny, który pobiera w wątku po jednej paczce - w pamięci jest
+zawsze tylko bieżąca paczka, a pierwsze bajty idą do klienta od razu.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
+
+_DONE = object()
+
+
+async def aiterate(iterator):
+    iterator = iter(iterator)
+    # thread_sensitive - kolejne paczki w tym samym wątku, z tym samym połączeniem i kursorem
+    anext_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await anext_chunk(iterator, _DONE)) is not _DONE:
+            yield chunk
+    finally:
+        # Przerwane pobieranie - zamknięcie generatora zwalnia kursor albo plik
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+def streaming_content(request, iterator):
+    """
+    `iterator` dla żądań WSGI, jego asynchroniczne opakowanie dla ASGI.
+    """
+    if isinstance(request, ASGIRequest):
+        return aiterate(iterator)
+    return iterator
+
+
+def read_blocks(file, block_size):
+    try:
+        while data := file.read(block_size):
+            yield data
+    finally:
+        file.close()
+
+
+def file_content(request, file):
+    """
+    Treść dla FileResponse: pod WSGI sam plik (serwer może użyć sendfile()),
+    pod ASGI iterator asynchroniczny czytający bloki wielkości wysyłanych przez handler.
+    """
+    if isinstance(request, ASGIRequest):
+        return aiterate(read_blocks(file, ASGIHandler.chunk_size))
+    return file
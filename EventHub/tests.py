@@ -1,3 +1,1045 @@
-from django.test import TestCase
+import copy
+import csv
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import include, path, reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from SWBO_Project.metrics import RollingMetrics, aggregate, rolling_metrics
+from users.models import UserProfile
+
+from . import async_views, categories, ical, registration
+from .checks import check_shared_cache
+from .forms import AttachmentForm, EventForm
+from .models import Category, Comment, Event, EventAttachment, FileTombstone, Participation, WaitlistEntry
+from .pagination import decode_cursor, encode_cursor
+from .search import search_events
+
+# ROOT_URLCONF dla AsyncViewTests - widoki asynchroniczne przed resztą adresów
+urlpatterns = [
+    path('', async_views.event_list, name='event-list'),
+    path('event/<int:pk>/', async_views.event_detail, name='event-detail'),
+    path('my-events/', async_views.my_events, name='my-events'),
+    path('', include('SWBO_Project.urls')),
+]
+
+
+def create_event(organizer, **kwargs):
+    start = timezone.now() + timedelta(days=7)
+    defaults = {
+        'title': 'Wydarzenie testowe',
+        'description': 'Opis',
+        'short_description': 'Krótki opis',
+        'location': 'Kraków',
+        'start_date': start,
+        'end_date': start + timedelta(hours=2),
+        'organizer': organizer,
+        'status': 'published',
+    }
+    defaults.update(kwargs)
+    return Event.objects.create(**defaults)
+
+
+class ParticipantsCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        cls.users = [User.objects.create_user(f'user{i}', password='pass') for i in range(3)]
+
+    def setUp(self):
+        self.event = create_event(self.organizer, max_participants=5)
+
+    def test_counter_follows_inserts_and_deletes(self):
+        for user in self.users:
+            Participation.objects.create(user=user, event=self.event)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participants_count, 3)
+        self.assertEqual(self.event.available_spots(), 2)
+
+        Participation.objects.filter(user=self.users[0]).delete()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participants_count, 2)
+
+    def test_counter_follows_cascade_delete(self):
+        Participation.objects.create(user=self.users[0], event=self.event)
+        self.users[0].delete()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participants_count, 0)
+
+    def test_recount_command_repairs_drift(self):
+        Participation.objects.create(user=self.users[0], event=self.event)
+        Event.objects.filter(pk=self.event.pk).update(participants_count=42)
+
+        call_command('recount_participants', stdout=StringIO())
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participants_count, 1)
+
+    def test_event_list_does_not_count_per_row(self):
+        for i in range(5):
+            create_event(self.organizer, title=f'Wydarzenie {i}')
+        with self.assertNumQueries(3):
+            # COUNT paginatora, strona wyników, kategorie
+            self.client.get(reverse('event-list'))
+
+
+class RegistrationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        cls.users = [User.objects.create_user(f'user{i}', password='pass') for i in range(4)]
+
+    def setUp(self):
+        self.event = create_event(self.organizer, max_participants=2)
+
+    def test_overflow_goes_to_waitlist(self):
+        results = [registration.join_event(self.event.pk, user) for user in self.users[:3]]
+        self.assertEqual(results, [registration.JOINED, registration.JOINED, registration.WAITLISTED])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participants_count, 2)
+
+    def test_waitlist_is_promoted_in_fifo_order(self):
+        for user in self.users:
+            registration.join_event(self.event.pk, user)
+
+        self.assertEqual(registration.leave_event(self.event.pk, self.users[0]), registration.LEFT)
+
+        self.assertTrue(Participation.objects.filter(user=self.users[2], event=self.event).exists())
+        self.assertEqual(
+            list(WaitlistEntry.objects.filter(event=self.event).values_list('user', flat=True)),
+            [self.users[3].pk],
+        )
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participants_count, 2)
+
+    def test_double_submit_is_idempotent(self):
+        self.client.force_login(self.users[0])
+        url = reverse('event-participate', args=[self.event.pk])
+        self.client.post(url, {'action': 'join'})
+        self.client.post(url, {'action': 'join'})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participants_count, 1)
+
+        self.client.post(url, {'action': 'leave'})
+        self.client.post(url, {'action': 'leave'})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participants_count, 0)
+
+    def test_raising_limit_promotes_waitlist(self):
+        for user in self.users:
+            registration.join_event(self.event.pk, user)
+        Event.objects.filter(pk=self.event.pk).update(max_participants=3)
+
+        self.assertEqual(registration.promote_waitlist(self.event.pk), [self.users[2].pk])
+
+    def test_freed_spot_goes_to_waitlist_before_new_joiner(self):
+        for user in self.users[:3]:
+            registration.join_event(self.event.pk, user)
+        # Usunięcie konta zwalnia miejsce bez promocji z listy rezerwowej
+        self.users[0].delete()
+
+        self.assertEqual(registration.join_event(self.event.pk, self.users[3]), registration.WAITLISTED)
+        self.assertTrue(Participation.objects.filter(user=self.users[2], event=self.event).exists())
+        self.assertEqual(
+            list(WaitlistEntry.objects.filter(event=self.event).values_list('user', flat=True)),
+            [self.users[3].pk],
+        )
+
+    def test_participants_are_not_promoted_twice(self):
+        for user in self.users[:3]:
+            registration.join_event(self.event.pk, user)
+        Participation.objects.filter(user=self.users[0], event=self.event).delete()
+        self.assertEqual(registration.join_event(self.event.pk, self.users[2]), registration.JOINED)
+        self.assertFalse(WaitlistEntry.objects.filter(event=self.event).exists())
+
+        # Wpis pozostawiony dla uczestnika (dane sprzed poprawki) jest pomijany i usuwany
+        WaitlistEntry.objects.create(user=self.users[1], event=self.event)
+        WaitlistEntry.objects.create(user=self.users[3], event=self.event)
+        Event.objects.filter(pk=self.event.pk).update(max_participants=4)
+        self.assertEqual(registration.promote_waitlist(self.event.pk), [self.users[3].pk])
+        self.assertFalse(WaitlistEntry.objects.filter(event=self.event).exists())
+        self.assertEqual(registration.leave_event(self.event.pk, self.users[1]), registration.LEFT)
+
+
+class ConcurrentRegistrationTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Wymaga bazy współdzielonej między połączeniami wątków')
+
+    def test_parallel_joins_never_exceed_capacity(self):
+        organizer = User.objects.create_user('organizer', password='pass')
+        users = User.objects.bulk_create(User(username=f'user{i}') for i in range(300))
+        event = create_event(organizer, max_participants=50)
+
+        def join(user):
+            try:
+                return registration.join_event(event.pk, user)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(join, users))
+
+        event.refresh_from_db()
+        self.assertEqual(results.count(registration.JOINED), 50)
+        self.assertEqual(results.count(registration.WAITLISTED), 250)
+        self.assertEqual(event.participants_count, 50)
+        self.assertEqual(Participation.objects.filter(event=event).count(), 50)
+
+
+class EventSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        cls.in_title = create_event(cls.organizer, title='Koncert jazzowy', description='Wieczór muzyki')
+        cls.in_description = create_event(cls.organizer, title='Spotkanie', description='Jam session jazzowa')
+        cls.other = create_event(cls.organizer, title='Warsztaty', description='Ceramika')
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('event-list'), {'search': query, **params})
+        return list(response.context['events'])
+
+    def test_results_are_ranked_by_relevance(self):
+        self.assertEqual(self.search('jazz'), [self.in_title, self.in_description])
+
+    def test_title_outranks_location_outranks_description(self):
+        in_location = create_event(self.organizer, title='Wieczór', location='Klub Jazzowy', description='Muzyka')
+        self.assertEqual(self.search('jazz'), [self.in_title, in_location, self.in_description])
+
+    def test_ranking_ignores_diacritics_like_matching(self):
+        in_description = create_event(self.organizer, title='Spacer', description='Karmienie gęsi',
+                                       start_date=timezone.now() + timedelta(days=30))
+        in_title = create_event(self.organizer, title='Gęsi w parku', description='Spacer')
+        self.assertEqual(self.search('gesi'), [in_title, in_description])
+
+    def test_index_follows_updates_and_deletes(self):
+        Event.objects.filter(pk=self.other.pk).update(title='Jazz nad Wisłą')
+        self.assertIn(self.other, self.search('wisła'))
+
+        self.in_title.delete()
+        self.assertNotIn(self.in_title, self.search('jazz'))
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"jazz*('), [self.in_title, self.in_description])
+        self.assertEqual(self.search('***'), [])
+
+
+@override_settings(EVENT_LIST_PAGINATION='cursor')
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        start = timezone.now() + timedelta(days=1)
+        # Po dwa wydarzenia z tą samą datą - sprawdza rozstrzyganie remisów po pk
+        cls.events = [
+            create_event(cls.organizer, title=f'Wydarzenie {i:02}', start_date=start + timedelta(hours=i // 2))
+            for i in range(20)
+        ]
+
+    def walk(self, **params):
+        seen, cursor = [], None
+        while True:
+            response = self.client.get(reverse('event-list'), {**params, **({'cursor': cursor} if cursor else {})})
+            page = response.context['page_obj']
+            seen.extend(page.object_list)
+            if not page.has_next():
+                return seen, page
+            cursor = page.next_cursor
+
+    def test_walks_all_events_in_order_without_count(self):
+        seen, _ = self.walk()
+        expected = list(Event.objects.order_by('-start_date', '-pk'))
+        self.assertEqual(seen, expected)
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse('event-list'), {'sort': 'title'})
+
+    def test_previous_cursor_returns_previous_page(self):
+        first = self.client.get(reverse('event-list'), {'sort': 'title'}).context['page_obj']
+        second = self.client.get(reverse('event-list'), {'sort': 'title', 'cursor': first.next_cursor}).context['page_obj']
+        back = self.client.get(reverse('event-list'), {'sort': 'title', 'cursor': second.previous_cursor}).context['page_obj']
+        self.assertEqual(back.object_list, first.object_list)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse('event-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_edited_cursor_returns_404(self):
+        valid = self.client.get(reverse('event-list')).context['page_obj'].next_cursor
+        _, value, pk, _ = decode_cursor(valid)
+        edited = {
+            'pk': encode_cursor('-start_date', value, 'abc', 'next'),
+            'value': encode_cursor('-start_date', [1], pk, 'next'),
+            'null': encode_cursor('-start_date', None, pk, 'next'),
+        }
+        for name, cursor in edited.items():
+            with self.subTest(name):
+                response = self.client.get(reverse('event-list'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class EventDetailFragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        cls.author = User.objects.create_user('author', password='pass')
+
+    def setUp(self):
+        cache.clear()
+        self.event = create_event(self.organizer)
+        self.url = reverse('event-detail', args=[self.event.pk])
+
+    def test_cache_hit_skips_fragment_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(event=self.event, author=self.author, content='Pierwszy')
+        self.client.get(self.url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Pierwszy')
+
+    def test_new_comment_invalidates_fragment(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(event=self.event, author=self.author, content='Nowy komentarz')
+
+        self.assertContains(self.client.get(self.url), 'Nowy komentarz')
+
+
+class EventDetailQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        cls.event = create_event(cls.organizer)
+        authors = User.objects.bulk_create(User(username=f'author{i}') for i in range(60))
+        Comment.objects.bulk_create(
+            Comment(event=cls.event, author=author, content=f'Komentarz {i}') for i, author in enumerate(authors)
+        )
+        for author in authors[:10]:
+            Participation.objects.create(user=author, event=cls.event)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_query_count_does_not_grow_with_comments(self):
+        url = reverse('event-detail', args=[self.event.pk])
+        # wydarzenie z licznikami, uczestnicy, strona komentarzy (brak załączników - bez zapytania)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['comments_page']), 20)
+
+    def test_participant_list_is_truncated(self):
+        self.client.force_login(self.organizer)
+        with mock.patch('EventHub.views.EVENT_PARTICIPANTS_PREVIEW', 4):
+            response = self.client.get(reverse('event-detail', args=[self.event.pk]))
+        self.assertContains(response, 'class="participant"', count=4)
+        self.assertContains(response, 'i 6 więcej')
+        self.assertContains(response, reverse('event-roster', args=[self.event.pk]) + '">pełna lista')
+        self.assertEqual(response.context['comments_page'].paginator.num_pages, 3)
+        self.assertContains(response, 'Komentarze (60)')
+
+
+class RequestMetricsTests(TestCase):
+    def test_request_is_logged_with_query_count(self):
+        # Kategorie z rejestru w cache, bez zapytania
+        categories.get_categories()
+        with self.assertLogs('swbo.requests', 'INFO') as logs:
+            self.client.get(reverse('event-list'))
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'event-list')
+        self.assertEqual(record['queries'], 1)
+
+    def test_metrics_endpoint_requires_superuser(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        admin = User.objects.create_superuser('admin', password='pass')
+        self.client.force_login(admin)
+        with mock.patch.object(rolling_metrics, 'flush_interval', 0):
+            self.client.get(reverse('event-list'))
+        report = self.client.get(reverse('metrics')).json()
+        self.assertIn('event-list', report['urls'])
+
+    def test_pool_stats_are_summed_across_workers(self):
+        cache.clear()
+        stats = {'size': 4, 'in_use': 1, 'waiting': 0, 'requests': 10, 'wait_ms': 20, 'timeouts': 0}
+        with mock.patch('SWBO_Project.metrics.pool_stats', return_value={'default': stats}):
+            rolling_metrics.flush({})
+        # Drugi proces z własnym stanem, jak osobny worker gunicorna
+        other_worker = RollingMetrics(max_workers=rolling_metrics.max_workers)
+        with mock.patch('SWBO_Project.metrics.os.getpid', return_value=-1), \
+                mock.patch('SWBO_Project.metrics.pool_stats', return_value={'default': stats}):
+            other_worker.flush({})
+        # Drugi proces zajął własny slot; kolejny zapis pierwszego nie dubluje go ani nie nadpisuje
+        with mock.patch('SWBO_Project.metrics.pool_stats', return_value={'default': stats}):
+            rolling_metrics.flush({})
+
+        report = aggregate()
+        self.assertEqual(report['workers'], 2)
+        # Testy działają na locmem - raport ostrzega, że nie widzi innych procesów
+        self.assertIn('warning', report)
+        pools = report['database_pools']
+        self.assertEqual(pools['default']['in_use'], 2)
+        self.assertEqual(pools['default']['avg_wait_ms'], 2)
+
+
+class AttachmentStorageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def attach(self, event, content=b'%PDF-1.4 regulamin'):
+        return EventAttachment.objects.create(
+            event=event, name='Regulamin', file=SimpleUploadedFile('regulamin.pdf', content)
+        )
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.attach(create_event(self.organizer))
+        second = self.attach(create_event(self.organizer))
+
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertTrue(first.file.name.startswith('blobs/'))
+        self.assertTrue(first.file.name.endswith('.pdf'))
+        self.assertNotEqual(first.file.name, self.attach(create_event(self.organizer), b'inny').file.name)
+
+    def collect(self, *args):
+        call_command('collect_attachment_files', *args, stdout=StringIO())
+
+    def test_blob_is_deleted_with_last_reference(self):
+        first = self.attach(create_event(self.organizer))
+        second = self.attach(create_event(self.organizer))
+        path = first.file.path
+
+        first.delete()
+        self.collect()
+        self.assertTrue(os.path.exists(path))
+
+        # Usunięcie kaskadowe tylko zapisuje nagrobek, plik znika dopiero po komendzie
+        second.event.delete()
+        self.assertTrue(FileTombstone.objects.filter(name=second.file.name).exists())
+        self.assertTrue(os.path.exists(path))
+        self.collect('--dry-run')
+        self.assertTrue(os.path.exists(path))
+        self.collect()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(FileTombstone.objects.exists())
+
+    def test_blob_deleted_again_after_reupload_is_collected(self):
+        path = self.attach(create_event(self.organizer)).file.path
+        EventAttachment.objects.get().delete()
+        # Ten sam plik wgrany ponownie przed zbieraniem dostaje świeży mtime
+        self.attach(create_event(self.organizer))
+        EventAttachment.objects.get().delete()
+
+        self.collect()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(FileTombstone.objects.exists())
+
+    def test_orphaned_files_are_collected(self):
+        kept = self.attach(create_event(self.organizer))
+        orphan = os.path.join(os.path.dirname(kept.file.path), 'orphan.pdf')
+        with open(orphan, 'wb') as handle:
+            handle.write(b'bez wiersza w bazie')
+
+        self.collect('--orphans', '--min-age', '0')
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(kept.file.path))
+
+    @override_settings(ATTACHMENT_MAX_SIZE=10)
+    def test_oversized_file_is_rejected(self):
+        form = AttachmentForm({'name': 'Duży'}, {'file': SimpleUploadedFile('duzy.pdf', b'x' * 11)})
+        self.assertFalse(form.is_valid())
+        self.assertIn('file', form.errors)
+
+
+class AttachmentDownloadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, ATTACHMENT_SENDFILE_BACKEND='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.attachment = EventAttachment.objects.create(
+            event=create_event(self.organizer), name='Program',
+            file=SimpleUploadedFile('program.pdf', b'0123456789'),
+        )
+        self.url = reverse('download-attachment', args=[self.attachment.pk])
+
+    def test_full_download_and_conditional_request(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertIn('Program.pdf', response['Content-Disposition'])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(response['Content-Length'], '4')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=20-').status_code, 416)
+
+    async def test_asgi_reads_file_in_blocks(self):
+        response = await self.async_client.get(self.url, headers={'Range': 'bytes=2-5'})
+        # Pod ASGI plik nie jest zbierany do listy przed wysłaniem
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), b'2345')
+        self.assertEqual(response['Content-Length'], '4')
+
+    def test_proxy_offload(self):
+        with override_settings(ATTACHMENT_SENDFILE_BACKEND='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.attachment.file.name)
+        self.assertEqual(response.content, b'')
+
+    def test_draft_attachments_are_hidden(self):
+        Event.objects.filter(pk=self.attachment.event_id).update(status='draft')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.organizer)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+class MyEventsDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user', password='pass')
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        for i in range(15):
+            Participation.objects.create(user=cls.user, event=create_event(cls.organizer, title=f'Koncert {i}'))
+        past = timezone.now() - timedelta(days=30)
+        create_event(cls.user, title='Minione spotkanie', start_date=past, end_date=past + timedelta(hours=2))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse('my-events')
+
+    def test_page_is_paginated_with_constant_queries(self):
+        # sesja, użytkownik z profilem (menu), liczniki obu zakładek, strona listy
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url, {'tab': 'participating'})
+        self.assertEqual(len(response.context['page_obj'].object_list), 12)
+        self.assertEqual(response.context['counts']['participating'], {'upcoming': 15, 'past': 0})
+
+        response = self.client.get(self.url, {'tab': 'organized', 'period': 'past'})
+        self.assertContains(response, 'Minione spotkanie')
+
+    def test_cache_is_invalidated_when_user_leaves(self):
+        self.client.get(self.url, {'tab': 'participating'})
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {'tab': 'participating'})
+
+        event = Event.objects.get(title='Koncert 0')
+        with self.captureOnCommitCallbacks(execute=True):
+            registration.leave_event(event.pk, self.user)
+        response = self.client.get(self.url, {'tab': 'participating'})
+        self.assertEqual(response.context['counts']['participating']['upcoming'], 14)
+
+
+class CategoryRegistryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name='Koncerty', color='#e74c3c')
+
+    def test_lookups_hit_database_once(self):
+        with self.assertNumQueries(1):
+            categories.get_categories()
+        with self.assertNumQueries(0):
+            self.assertTrue(categories.categories_exist())
+            self.assertEqual(categories.get_category(self.category.pk).color, '#e74c3c')
+            self.assertIn('Koncerty', str(EventForm()['category']))
+        # Walidacja modelu nadal sprawdza w bazie, czy kategoria istnieje
+        form = EventForm(data={'category': str(self.category.pk)})
+        form.is_valid()
+        self.assertEqual(form.cleaned_data['category'], self.category)
+
+    def test_save_and_delete_invalidate_registry(self):
+        categories.get_categories()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Warsztaty')
+        self.assertEqual([c.name for c in categories.get_categories()], ['Koncerty', 'Warsztaty'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.all().delete()
+        self.assertFalse(categories.categories_exist())
+
+    def test_process_local_cache_with_several_workers_is_reported(self):
+        with override_settings(WEB_CONCURRENCY=3):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['EventHub.W001'])
+        self.assertEqual(check_shared_cache(None), [])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Replika w pliku SQLite')
+class ReplicaRoutingTests(TestCase):
+    """
+    Baza testowa jako główna i osobny plik SQLite jako replika (bez replikacji,
+    więc widać, z której bazy pochodzą dane).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.replica_dir = tempfile.mkdtemp()
+        settings_dict = copy.deepcopy(connections['default'].settings_dict)
+        settings_dict['NAME'] = os.path.join(cls.replica_dir, 'replica.sqlite3')
+        # Połączenie spoza DATABASES - TestCase nie blokuje zapytań do niego
+        connections['replica'] = connections['default'].__class__(settings_dict, alias='replica')
+        call_command('migrate', database='replica', verbosity=0)
+
+        # bulk_create - bez sygnału tworzącego profil w bazie głównej
+        organizer, = User.objects.db_manager('replica').bulk_create([User(username='user')])
+        Event.objects.using('replica').create(
+            title='Na replice', description='Opis', short_description='Opis', location='Kraków',
+            start_date=cls.event.start_date, end_date=cls.event.end_date, organizer=organizer,
+            status='published',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        shutil.rmtree(cls.replica_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user', password='pass')
+        UserProfile.objects.filter(user=cls.user).update(can_create_events=True)
+        cls.event = create_event(cls.user, title='Na bazie głównej')
+
+    def setUp(self):
+        cache.clear()
+        settings_override = override_settings(DATABASE_REPLICAS=['replica'])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_reads_go_to_replica_until_user_writes(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('event-list'))
+        self.assertContains(response, 'Na replice')
+        self.assertNotContains(response, 'Na bazie głównej')
+
+        # Zapis idzie do bazy głównej i przypina do niej kolejne odczyty
+        response = self.client.post(reverse('add-comment', args=[self.event.pk]), {'content': 'Komentarz'})
+        self.assertTrue(self.client.cookies['db_pin'].value)
+        self.assertTrue(Comment.objects.using('default').filter(event=self.event).exists())
+        self.assertContains(self.client.get(reverse('event-list')), 'Na bazie głównej')
+
+        self.client.cookies.pop('db_pin')
+        self.assertContains(self.client.get(reverse('event-list')), 'Na replice')
+
+    def test_views_without_marker_read_from_primary(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('event-update', args=[self.event.pk]))
+        self.assertContains(response, 'Na bazie głównej')
+
+
+@override_settings(ROOT_URLCONF='EventHub.tests')
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user', password='pass')
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        cls.events = [create_event(cls.organizer, title=f'Koncert {i}') for i in range(12)]
+        Participation.objects.create(user=cls.user, event=cls.events[0])
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_event_list_is_paginated(self):
+        response = await self.async_client.get(reverse('event-list'), {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertEqual(len(response.context['events']), 3)
+
+        response = await self.async_client.get(reverse('event-list'), {'page': 5})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(EVENT_LIST_PAGINATION='cursor')
+    async def test_event_list_cursor_mode(self):
+        response = await self.async_client.get(reverse('event-list'))
+        self.assertEqual(len(response.context['events']), 9)
+        self.assertTrue(response.context['page_obj'].has_next())
+
+    async def test_event_detail_shows_participation(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('event-detail', args=[self.events[0].pk]))
+        self.assertContains(response, 'Koncert 0')
+        self.assertTrue(response.context['is_participating'])
+
+        response = await self.async_client.get(reverse('event-detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_my_events_requires_login(self):
+        response = await self.async_client.get(reverse('my-events'))
+        self.assertEqual(response.status_code, 302)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('my-events'), {'tab': 'participating'})
+        self.assertContains(response, 'Koncert 0')
+        self.assertEqual(response.context['counts']['participating'], {'upcoming': 1, 'past': 0})
+
+    def test_asgi_middleware_chain_is_not_adapted(self):
+        # Łańcuch jak w SWBO_Project/asgi.py - pliki statyczne obsługiwane przed Django
+        middleware = [name for name in settings.MIDDLEWARE if name != 'whitenoise.middleware.WhiteNoiseMiddleware']
+        with override_settings(MIDDLEWARE=middleware, DEBUG=True):
+            with self.assertNoLogs('django.request', 'DEBUG'):
+                ASGIHandler()
+            # Kontrola samego testu: middleware synchroniczne jest wykrywane
+            with self.assertLogs('django.request', 'DEBUG'):
+                with override_settings(MIDDLEWARE=['whitenoise.middleware.WhiteNoiseMiddleware', *middleware]):
+                    ASGIHandler()
+
+
+class EventImportExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        cls.category = Category.objects.create(name='Koncerty')
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'events')
+
+    def write(self, content):
+        with open(self.path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+
+    def test_export_import_round_trip(self):
+        for i in range(3):
+            create_event(self.organizer, title=f'Koncert {i}', category=self.category, max_participants=10)
+        output = StringIO()
+        call_command('export_events', stdout=output, stderr=StringIO())
+        Event.objects.all().delete()
+
+        self.write(output.getvalue())
+        call_command('import_events', self.path, '--batch-size', '2', stdout=StringIO())
+        events = Event.objects.order_by('title')
+        self.assertEqual([event.title for event in events], ['Koncert 0', 'Koncert 1', 'Koncert 2'])
+        self.assertEqual({(e.category_id, e.organizer_id, e.max_participants, e.status) for e in events},
+                         {(self.category.pk, self.organizer.pk, 10, 'published')})
+        self.assertEqual(Event.objects.filter(title__startswith='Koncert').count(), 3)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        row = {
+            'title': 'Warsztaty', 'short_description': 'Krótko', 'description': 'Opis', 'location': 'Kraków',
+            'category': 'koncerty',
+            'start_date': '2030-05-01T18:00', 'end_date': '2030-05-01T20:00', 'organizer': 'organizer',
+        }
+        lines = [
+            row,
+            {**row, 'organizer': 'nieznany'},
+            {**row, 'end_date': '2030-04-01T20:00'},
+            {**row, 'status': 'archiwum'},
+        ]
+        self.write('\n'.join(json.dumps(line) for line in lines) + '\nnie json\n')
+        errors = StringIO()
+        call_command('import_events', self.path, '--format', 'jsonl', stdout=StringIO(), stderr=errors)
+
+        event = Event.objects.get()
+        self.assertEqual((event.category, event.status), (self.category, 'draft'))
+        self.assertEqual(errors.getvalue().count('Wiersz'), 4)
+        self.assertIn('Wiersz 2: organizer', errors.getvalue())
+
+
+class RosterExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        cls.event = create_event(cls.organizer)
+        cls.users = [User.objects.create_user(f'user{i}', email=f'user{i}@example.com') for i in range(3)]
+        for user in cls.users:
+            Participation.objects.create(user=user, event=cls.event)
+        Participation.objects.filter(user=cls.users[2]).update(notes='=SUMA(A1)')
+        cls.url = reverse('event-roster', args=[cls.event.pk])
+
+    def test_organizer_streams_csv(self):
+        self.client.force_login(self.organizer)
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:2], ['Użytkownik', 'E-mail'])
+        self.assertEqual([row[0] for row in rows[1:]], ['user0', 'user1', 'user2'])
+        self.assertEqual(rows[3][5], '=SUMA(A1)')
+
+    async def test_asgi_response_is_streamed_asynchronously(self):
+        await self.async_client.aforce_login(self.organizer)
+        with mock.patch('EventHub.roster.CHUNK_SIZE', 1):
+            response = await self.async_client.get(self.url)
+            # Pod ASGI synchroniczny iterator byłby najpierw w całości zebrany do listy
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), 3)
+        rows = list(csv.reader(StringIO(b''.join(chunks).decode())))
+        self.assertEqual([row[0] for row in rows[1:]], ['user0', 'user1', 'user2'])
+
+    def test_excel_variant(self):
+        self.client.force_login(self.organizer)
+        content = b''.join(self.client.get(self.url, {'format': 'excel'}).streaming_content).decode()
+        self.assertTrue(content.startswith('\ufeffUżytkownik;E-mail;'))
+        self.assertIn(";'=SUMA(A1)\r\n", content)
+
+    def test_only_organizer_can_export(self):
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        self.client.force_login(self.users[0])
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class CalendarFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        cls.user = User.objects.create_user('user', password='pass')
+        cls.category = Category.objects.create(name='Koncerty')
+        cls.event = create_event(cls.organizer, title='Jazz, blues; i soul', category=cls.category)
+        create_event(cls.organizer, title='Szkic', status='draft')
+        Participation.objects.create(user=cls.user, event=cls.event)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_and_conditional_get(self):
+        url = reverse('events-calendar')
+        response = self.client.get(url)
+        content = response.content.decode()
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertIn('SUMMARY:Jazz\\, blues\\; i soul\r\n', content)
+        self.assertNotIn('Szkic', content)
+        self.assertEqual(content.count('BEGIN:VEVENT'), 1)
+
+        # Niezmieniony kanał: jedno zapytanie agregujące i 304
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+        Event.objects.filter(pk=self.event.pk).delete()
+        self.assertNotEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Samo If-Modified-Since nie daje 304 - usunięcie nie zmienia najnowszego updated_at
+        since = http_date(timezone.now().timestamp() + 60)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+    @override_settings(ICAL_FEED_CACHE_MAX_EVENTS=0)
+    def test_large_feed_is_streamed(self):
+        response = self.client.get(reverse('events-calendar'), {'category': self.category.pk})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        self.assertTrue(content.startswith('BEGIN:VCALENDAR') and content.endswith('END:VCALENDAR\r\n'))
+        self.assertEqual(self.client.get(reverse('events-calendar'), {'category': 0}).status_code, 404)
+
+    def test_private_feed_requires_valid_token(self):
+        self.client.force_login(self.user)
+        url = self.client.get(reverse('my-events')).context['calendar_url']
+        self.client.logout()
+
+        response = self.client.get(url)
+        self.assertContains(response, 'UID:event-')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertEqual(self.client.get(url.replace(str(self.user.pk), str(self.organizer.pk), 1)).status_code, 404)
+
+    def test_private_feed_address_can_be_reset(self):
+        self.client.force_login(self.user)
+        old_url = self.client.get(reverse('my-events')).context['calendar_url']
+        self.client.post(reverse('reset-calendar-token'))
+        new_url = self.client.get(reverse('my-events')).context['calendar_url']
+        self.client.logout()
+
+        self.assertNotEqual(new_url, old_url)
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        self.assertContains(self.client.get(new_url), 'UID:event-')
+
+    @override_settings(ICAL_FEED_CACHE_MAX_EVENTS=0)
+    async def test_large_feed_is_streamed_asynchronously_under_asgi(self):
+        response = await self.async_client.get(reverse('events-calendar'))
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertTrue(content.startswith('BEGIN:VCALENDAR') and content.endswith('END:VCALENDAR\r\n'))
+
+    def test_long_lines_are_folded(self):
+        line = ical.fold('DESCRIPTION:' + 'żółć ' * 40).rstrip('\r\n')
+        self.assertTrue(all(len(part.encode()) <= 75 for part in line.split('\r\n')))
+        self.assertEqual(line.replace('\r\n ', ''), 'DESCRIPTION:' + 'żółć ' * 40)
+
+
+class EventApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        cls.category = Category.objects.create(name='Koncerty')
+        start = timezone.now() + timedelta(days=1)
+        cls.events = [
+            create_event(cls.organizer, title=f'Koncert jazzowy {i}', category=cls.category,
+                         start_date=start + timedelta(days=i), end_date=start + timedelta(days=i, hours=2))
+            for i in range(5)
+        ]
+        cls.draft = create_event(cls.organizer, title='Szkic', status='draft')
+
+    def test_sparse_fields_and_cursor_pagination(self):
+        url = reverse('api-event-list')
+        response = self.client.get(url, {'fields': 'id,title,category', 'limit': 2, 'sort': 'start_date'})
+        data = response.json()
+        self.assertEqual(
+            data['results'][0], {'id': self.events[0].pk, 'title': 'Koncert jazzowy 0', 'category': 'Koncerty'}
+        )
+        self.assertIsNone(data['previous'])
+
+        data = self.client.get(data['next']).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.events[2].pk, self.events[3].pk])
+        self.assertIsNotNone(data['previous'])
+
+        self.assertEqual(self.client.get(url, {'fields': 'id,password'}).status_code, 400)
+
+    def test_search_uses_page_numbers(self):
+        data = self.client.get(reverse('api-event-list'), {'search': 'jazz', 'limit': 3, 'fields': 'id'}).json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertIn('page=2', data['next'])
+
+    def test_conditional_get_and_gzip(self):
+        url = reverse('api-event-detail', args=[self.events[0].pk])
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()['organizer'], 'organizer')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        # Zapis na wydarzenie zmienia licznik bez zmiany updated_at - ETag też się zmienia
+        Participation.objects.create(user=self.organizer, event=self.events[0])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_unpublished_event_is_not_hidden_by_if_modified_since(self):
+        url = reverse('api-event-list')
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        Event.objects.filter(pk=self.events[0].pk).update(status='draft')
+        since = http_date(timezone.now().timestamp() + 60)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.events[0].pk, [event['id'] for event in response.json()['results']])
+
+    def test_drafts_are_hidden(self):
+        url = reverse('api-event-detail', args=[self.draft.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        results = self.client.get(reverse('api-event-list')).json()['results']
+        self.assertNotIn(self.draft.pk, [row['id'] for row in results])
+        self.client.force_login(self.organizer)
+        self.assertEqual(self.client.get(url).json()['status'], 'draft')
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='pass')
+        cls.organizer = User.objects.create_user('organizer', password='pass')
+        cls.categories = [Category.objects.create(name=f'Kategoria {i}') for i in range(3)]
+        cls.events = [
+            create_event(cls.organizer, title=f'Koncert {i}', category=cls.categories[i % 3]) for i in range(6)
+        ]
+        for event in cls.events[:2]:
+            Participation.objects.create(user=cls.admin, event=event)
+            Participation.objects.create(user=cls.organizer, event=event)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_category_counts_are_annotated(self):
+        url = reverse('admin:EventHub_category_changelist')
+        # sesja, użytkownik, dwa COUNT listy, strona z licznikami - bez zapytania na wiersz
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(sorted(obj.event_count for obj in response.context['cl'].result_list), [2, 2, 2])
+
+    def test_event_filter_and_prefix_search(self):
+        url = reverse('admin:EventHub_participation_changelist')
+        response = self.client.get(url, {'event': self.events[0].pk})
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertContains(response, 'name="event" value="%d"' % self.events[0].pk)
+
+        response = self.client.get(url, {'q': 'ORG'})
+        self.assertEqual({p.user for p in response.context['cl'].result_list}, {self.organizer})
+        response = self.client.get(url, {'q': 'koncert 1'})
+        self.assertEqual({p.event for p in response.context['cl'].result_list}, {self.events[1]})
+
+    def test_event_changelist_skips_full_count(self):
+        response = self.client.get(reverse('admin:EventHub_event_changelist'), {'q': 'koncert'})
+        self.assertEqual(response.context['cl'].result_count, 6)
+        self.assertIsNone(response.context['cl'].full_result_count)
+        self.assertIsNone(response.context['cl'].date_hierarchy)
+
+        Event.objects.filter(pk=self.events[0].pk).update(location='Filharmonia Krakowska')
+        response = self.client.get(reverse('admin:EventHub_event_changelist'), {'q': 'filharmonia'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.events[0]])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Przebudowa tabeli przy AlterField tylko w SQLite')
+class TableRebuildTests(TransactionTestCase):
+    def index_names(self, table):
+        with connection.cursor() as cursor:
+            return set(connection.introspection.get_constraints(cursor, table))
+
+    def alter_title(self, max_length):
+        old_field = Event._meta.get_field('title')
+        new_field = copy.copy(old_field)
+        new_field.max_length = max_length
+        with connection.schema_editor() as schema_editor:
+            schema_editor.alter_field(Event, old_field, new_field)
+
+    def test_indexes_and_search_triggers_are_restored(self):
+        self.addCleanup(call_command, 'migrate', verbosity=0)
+        self.addCleanup(self.alter_title, 200)
+        self.alter_title(250)
+        # Indeks w stanie migracji jest tworzony razem z nową tabelą
+        self.assertIn('event_title_prefix_idx', self.index_names('EventHub_event'))
+
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX auth_user_username_prefix_idx')
+        # Triggery FTS i indeksy auth_user wracają po migrate
+        call_command('migrate', verbosity=0)
+        self.assertIn('auth_user_username_prefix_idx', self.index_names('auth_user'))
+        event = create_event(User.objects.create_user('organizer'), title='Koncert jazzowy')
+        self.assertEqual(list(search_events(Event.objects.all(), 'jazz')), [event])
@@ -1,15 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, async_views, views
+
+if settings.ASYNC_VIEWS:
+    event_list, event_detail, my_events = async_views.event_list, async_views.event_detail, async_views.my_events
+else:
+    event_list, event_detail, my_events = views.EventListView.as_view(), views.EventDetailView.as_view(), views.my_events
 
 urlpatterns = [
-    path('', views.EventListView.as_view(), name='event-list'),
-    path('event/<int:pk>/', views.EventDetailView.as_view(), name='event-detail'),
+    path('', event_list, name='event-list'),
+    path('event/<int:pk>/', event_detail, name='event-detail'),
     path('event/new/', views.EventCreateView.as_view(), name='event-create'),
     path('event/<int:pk>/update/', views.EventUpdateView.as_view(), name='event-update'),
     path('event/<int:pk>/delete/', views.EventDeleteView.as_view(), name='event-delete'),
     path('event/<int:pk>/participate/', views.participate_toggle, name='event-participate'),
+    path('event/<int:pk>/participants.csv', views.export_roster, name='event-roster'),
     path('event/<int:pk>/attachment/', views.add_attachment, name='add-attachment'),
+    path('attachment/<int:pk>/download/', views.download_attachment, name='download-attachment'),
     path('attachment/<int:pk>/delete/', views.delete_attachment, name='delete-attachment'),
     path('event/<int:pk>/comment/', views.add_comment, name='add-comment'),
-    path('my-events/', views.my_events, name='my-events'),
+    path('my-events/', my_events, name='my-events'),
+    path('calendar.ics', views.events_calendar, name='events-calendar'),
+    path('event/<int:pk>/calendar.ics', views.event_calendar, name='event-calendar'),
+    path('calendar/<str:token>.ics', views.user_calendar, name='user-calendar'),
+    path('calendar/reset/', views.reset_calendar_token, name='reset-calendar-token'),
+    path('api/v1/events/', api.event_list, name='api-event-list'),
+    path('api/v1/events/<int:pk>/', api.event_detail, name='api-event-detail'),
 ]
\ No newline at end of file
@@ -1,13 +1,53 @@
+import os
+
+from django.conf import settings
+from django.http import Http404
+from django.template.defaultfilters import filesizeformat
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib import messages
-from django.db.models import Q, Count
-from .models import Event, Category, Participation, EventAttachment
+from django.core.cache import cache
+from django.utils import timezone
+from django.views.decorators.http import require_safe
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from SWBO_Project.db_routing import replica_reads
+from users.models import UserProfile, get_profile
+from users.permissions import EventCreatorRequiredMixin
+
+from .models import Event, Participation, EventAttachment, WaitlistEntry, Comment
 from .forms import EventForm, CommentForm, AttachmentForm
-
-
+from . import registration
+from .caching import get_dashboard_version, get_fragment_versions
+from .categories import categories_exist, get_categories, get_category
+from .downloads import serve_file
+from .ical import feed_response, feed_token, token_owner
+from .pagination import CountedPaginator, InvalidCursor, paginate_by_cursor
+from .roster import roster_response
+from .search import search_events
+from .storage import attachment_max_size
+
+MY_EVENTS_TABS = ('organized', 'participating')
+MY_EVENTS_PAGINATE_BY = 12
+# Strona wydarzenia pokazuje tylko początek listy uczestników - całość w eksporcie CSV
+EVENT_PARTICIPANTS_PREVIEW = 50
+
+REGISTRATION_MESSAGES = {
+    registration.JOINED: (messages.SUCCESS, 'Zapisano na wydarzenie!'),
+    registration.WAITLISTED: (messages.INFO, 'Brak wolnych miejsc - dodano Cię do listy rezerwowej.'),
+    registration.ALREADY_PARTICIPATING: (messages.INFO, 'Jesteś już zapisany na to wydarzenie.'),
+    registration.ALREADY_WAITLISTED: (messages.INFO, 'Jesteś już na liście rezerwowej.'),
+    registration.LEFT: (messages.SUCCESS, 'Wypisano z wydarzenia!'),
+    registration.LEFT_WAITLIST: (messages.SUCCESS, 'Usunięto Cię z listy rezerwowej.'),
+    registration.NOT_REGISTERED: (messages.INFO, 'Nie jesteś zapisany na to wydarzenie.'),
+    registration.UNAVAILABLE: (messages.ERROR, 'Zapisy na to wydarzenie są niedostępne.'),
+}
+
+
+@replica_reads
 class EventListView(ListView):
     model = Event
     template_name = 'events/event_list.html'
@@ -24,59 +64,118 @@ class EventListView(ListView):
 
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(location__icontains=search)
-            )
+            # Indeks pełnotekstowy zamiast LIKE '%x%' po całej tabeli
+            queryset = search_events(queryset, search)
 
-        # ANNOTATE: Obliczanie liczby uczestników dla KAŻDEGO zapytania
-        # Używamy distinct=True dla bezpieczeństwa na wypadek zduplikowanych wierszy
-        queryset = queryset.annotate(participants_count=Count('participants', distinct=True))
+        # participants_count jest przechowywany w Event - bez JOIN i GROUP BY
+        queryset = queryset.select_related('category', 'organizer')
 
-        # Sortowanie
-        sort = self.request.GET.get('sort', '-start_date')
+        # Sortowanie - przy wyszukiwaniu domyślnie według trafności
+        sort = self.request.GET.get('sort') or ('relevance' if search else '-start_date')
 
-        # Lista bezpiecznych pól do sortowania (w tym nowe participants_count)
+        # Lista bezpiecznych pól do sortowania
         valid_sort_fields = ['title', 'start_date', 'end_date', 'created_at', 'participants_count']
 
-        if sort.lstrip('-') in valid_sort_fields:  # lstrip('-') usuwa minus
+        if search and sort == 'relevance':
+            queryset = queryset.order_by('-search_rank', '-start_date')
+        elif sort.lstrip('-') in valid_sort_fields:  # lstrip('-') usuwa minus
             queryset = queryset.order_by(sort)
         else:
             # Domyślne sortowanie, jeśli podano nieprawidłowe pole
-            queryset = queryset.order_by('-start_date')
+            sort = '-start_date'
+            queryset = queryset.order_by(sort)
 
+        self.sort = sort
         return queryset
 
+    def paginate_queryset(self, queryset, page_size):
+        # Tryb kursorowy nie obsługuje sortowania po trafności - wtedy zwykłe strony
+        if settings.EVENT_LIST_PAGINATION != 'cursor' or self.sort == 'relevance':
+            return super().paginate_queryset(queryset, page_size)
+
+        try:
+            page = paginate_by_cursor(queryset, self.sort, self.request.GET.get('cursor'), page_size)
+        except InvalidCursor:
+            raise Http404('Nieprawidłowy kursor stronicowania.')
+        return None, page, page.object_list, page.has_other_pages()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.all()
+        context['categories'] = get_categories()
         return context
 
 
+def related_count(model):
+    """
+    Podzapytanie liczące wiersze powiązane z wydarzeniem - bez JOIN mnożącego wiersze.
+    """
+    counts = model.objects.filter(event=OuterRef('pk')).order_by().values('event').annotate(total=Count('pk'))
+    return Coalesce(Subquery(counts.values('total'), output_field=IntegerField()), Value(0))
+
+
+@replica_reads
 class EventDetailView(DetailView):
     model = Event
     template_name = 'events/event_detail.html'
+    comments_paginate_by = 20
+
+    def get_queryset(self):
+        return event_detail_queryset(self.request.user)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['comment_form'] = CommentForm()
-        context['is_participating'] = False
-        if self.request.user.is_authenticated:
-            context['is_participating'] = Participation.objects.filter(
-                user=self.request.user, event=self.object
-            ).exists()
+        context.update(event_detail_context(
+            self.request, self.object, get_fragment_versions(self.object.pk), self.comments_paginate_by
+        ))
         return context
 
 
-class EventCreateView(LoginRequiredMixin, CreateView):
+def event_detail_queryset(user):
+    # Jedno zapytanie: wydarzenie, kategoria, organizator, liczniki i status użytkownika
+    queryset = Event.objects.select_related('category', 'organizer').annotate(
+        attachments_count=related_count(EventAttachment),
+        comments_count=related_count(Comment),
+    )
+    if user.is_authenticated:
+        queryset = queryset.annotate(
+            user_participates=Exists(Participation.objects.filter(event=OuterRef('pk'), user=user)),
+            user_waitlisted=Exists(WaitlistEntry.objects.filter(event=OuterRef('pk'), user=user)),
+        )
+    return queryset
+
+
+def event_detail_context(request, event, fragment_versions, comments_paginate_by):
+    """
+    Kontekst strony wydarzenia (widok synchroniczny i async_views). Nie wykonuje
+    zapytań - listy są leniwe i liczone dopiero przy braku fragmentu w cache.
+    """
+    paginator = CountedPaginator(
+        event.comments.select_related('author'), comments_paginate_by, count=event.comments_count
+    )
+    return {
+        'comment_form': CommentForm(),
+        'is_organizer': request.user.pk == event.organizer_id,
+        'fragment_versions': fragment_versions,
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+        'is_participating': getattr(event, 'user_participates', False),
+        'is_waitlisted': getattr(event, 'user_waitlisted', False),
+        'attachments': event.attachments.all(),
+        'participants': (
+            event.participants.only('username').order_by('participation__registered_at')[:EVENT_PARTICIPANTS_PREVIEW]
+        ),
+        'participants_hidden': max(event.participants_count - EVENT_PARTICIPANTS_PREVIEW, 0),
+        'comments_page': paginator.get_page(request.GET.get('comments_page')),
+    }
+
+
+class EventCreateView(LoginRequiredMixin, EventCreatorRequiredMixin, CreateView):
     model = Event
     form_class = EventForm
     template_name = 'events/event_form.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories_exist'] = Category.objects.exists()
+        context['categories_exist'] = categories_exist()
         return context
 
     def form_valid(self, form):
@@ -85,33 +184,35 @@ class EventCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class EventUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class EventUpdateView(LoginRequiredMixin, EventCreatorRequiredMixin, UpdateView):
     model = Event
     form_class = EventForm
     template_name = 'events/event_form.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories_exist'] = Category.objects.exists()
+        context['categories_exist'] = categories_exist()
         return context
 
-    def test_func(self):
-        event = self.get_object()
-        return self.request.user == event.organizer
+    def has_permission_for_object(self):
+        return self.request.user.pk == self.get_object().organizer_id
 
     def form_valid(self, form):
         messages.success(self.request, 'Wydarzenie zostało zaktualizowane!')
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        if 'max_participants' in form.changed_data:
+            # Zwiększony limit zwalnia miejsca dla listy rezerwowej
+            registration.promote_waitlist(self.object.pk)
+        return response
 
 
-class EventDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class EventDeleteView(LoginRequiredMixin, EventCreatorRequiredMixin, DeleteView):
     model = Event
     template_name = 'events/event_confirm_delete.html'
     success_url = '/'
 
-    def test_func(self):
-        event = self.get_object()
-        return self.request.user == event.organizer
+    def has_permission_for_object(self):
+        return self.request.user.pk == self.get_object().organizer_id
 
     def delete(self, request, *args, **kwargs):
         messages.success(request, 'Wydarzenie zostało usunięte!')
@@ -120,19 +221,15 @@ class EventDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 @login_required
 def participate_toggle(request, pk):
-    event = get_object_or_404(Event, pk=pk)
-
     if request.method == 'POST':
-        participation, created = Participation.objects.get_or_create(
-            user=request.user,
-            event=event
-        )
-
-        if created:
-            messages.success(request, 'Zapisano na wydarzenie!')
+        # Jawna akcja zamiast przełączania - podwójne wysłanie formularza niczego nie psuje
+        if request.POST.get('action') == 'leave':
+            result = registration.leave_event(pk, request.user)
         else:
-            participation.delete()
-            messages.success(request, 'Wypisano z wydarzenia!')
+            result = registration.join_event(pk, request.user)
+
+        level, message = REGISTRATION_MESSAGES[result]
+        messages.add_message(request, level, message)
 
     return redirect('event-detail', pk=pk)
 
@@ -153,17 +250,142 @@ def add_comment(request, pk):
     return redirect('event-detail', pk=pk)
 
 
+def my_events_params(request):
+    tab = request.GET.get('tab') if request.GET.get('tab') in MY_EVENTS_TABS else 'organized'
+    period = request.GET.get('period') if request.GET.get('period') in ('upcoming', 'past') else 'upcoming'
+    return tab, period
+
+
+def my_events_querysets(user):
+    return {
+        'organized': Event.objects.filter(organizer=user).select_related('category'),
+        'participating': Event.objects.filter(participants=user).select_related('category', 'organizer'),
+    }
+
+
+def my_events_counts(now):
+    return {
+        'upcoming': Count('pk', filter=Q(end_date__gte=now)),
+        'past': Count('pk', filter=Q(end_date__lt=now)),
+    }
+
+
+def my_events_period(queryset, period, now):
+    if period == 'upcoming':
+        return queryset.filter(end_date__gte=now).order_by('start_date', 'pk')
+    return queryset.filter(end_date__lt=now).order_by('-start_date', '-pk')
+
+
+@replica_reads
 @login_required
 def my_events(request):
-    organized = Event.objects.filter(organizer=request.user)
-    participating = Event.objects.filter(participants=request.user)
+    """
+    Panel użytkownika: zakładka (organizowane / uczestniczę) i okres (nadchodzące / minione)
+    z parametrów GET, stronicowane. Liczniki zakładek i strony list trafiają do cache
+    pod kluczem z wersją panelu, podbijaną przy zapisie, wypisie i edycji wydarzenia.
+    """
+    user = request.user
+    tab, period = my_events_params(request)
+    now = timezone.now()
+    querysets = my_events_querysets(user)
+    cache_prefix = f'eventhub:user:{user.pk}:dashboard:{get_dashboard_version(user.pk)}'
+    timeout = settings.MY_EVENTS_CACHE_TIMEOUT
+
+    counts = cache.get(f'{cache_prefix}:counts')
+    if counts is None:
+        # Nadchodzące i minione jednym zapytaniem na zakładkę
+        counts = {
+            name: queryset.aggregate(**my_events_counts(now)) for name, queryset in querysets.items()
+        }
+        cache.set(f'{cache_prefix}:counts', counts, timeout)
+
+    events = my_events_period(querysets[tab], period, now)
+    paginator = CountedPaginator(events, MY_EVENTS_PAGINATE_BY, count=counts[tab][period])
+    page = paginator.get_page(request.GET.get('page'))
+
+    page_key = f'{cache_prefix}:{tab}:{period}:{page.number}'
+    object_list = cache.get(page_key)
+    if object_list is None:
+        object_list = list(page.object_list)
+        cache.set(page_key, object_list, timeout)
+    page.object_list = object_list
 
     return render(request, 'events/my_events.html', {
-        'organized_events': organized,
-        'participating_events': participating
+        'tab': tab,
+        'period': period,
+        'counts': counts,
+        'page_obj': page,
+        'calendar_url': reverse('user-calendar', args=[feed_token(user)]),
     })
 
 
+@replica_reads
+@require_safe
+def events_calendar(request):
+    """
+    Kanał .ics opublikowanych wydarzeń, opcjonalnie jednej kategorii (?category=<id>).
+    """
+    queryset = Event.objects.filter(status='published')
+    name, scope = 'EventHub', 'published'
+    if request.GET.get('category'):
+        try:
+            category = get_category(int(request.GET['category']))
+        except ValueError:
+            category = None
+        if category is None:
+            raise Http404('Nie ma takiej kategorii.')
+        queryset = queryset.filter(category_id=category.pk)
+        name, scope = f'EventHub - {category.name}', f'category:{category.pk}'
+    return feed_response(request, queryset, name, 'eventhub.ics', scope)
+
+
+@replica_reads
+@require_safe
+def event_calendar(request, pk):
+    event = get_object_or_404(Event.objects.only('title', 'status', 'organizer_id'), pk=pk)
+    # Szkice tylko dla organizatora - kalendarze subskrybują bez sesji
+    if event.status == 'draft' and request.user.pk != event.organizer_id:
+        raise Http404
+    return feed_response(
+        request, Event.objects.filter(pk=pk), event.title, f'wydarzenie-{pk}.ics', f'event:{pk}',
+        private=event.status == 'draft',
+    )
+
+
+@replica_reads
+@require_safe
+def user_calendar(request, token):
+    """
+    Prywatny kanał "Moje wydarzenia" pod adresem z podpisanym tokenem.
+    """
+    owner = token_owner(token)
+    if owner is None:
+        raise Http404
+    user_id, version = owner
+    # Token sprzed resetu adresu ma starszą wersję niż profil
+    if not UserProfile.objects.filter(user_id=user_id, user__is_active=True, calendar_token_version=version).exists():
+        raise Http404
+    queryset = Event.objects.filter(
+        Q(organizer_id=user_id) | Q(pk__in=Participation.objects.filter(user_id=user_id).values('event_id'))
+    )
+    # Wersja panelu zmienia się przy zapisie i wypisie, których updated_at wydarzenia nie widzi
+    scope = f'user:{user_id}:{get_dashboard_version(user_id)}'
+    return feed_response(request, queryset, 'Moje wydarzenia', 'moje-wydarzenia.ics', scope, private=True)
+
+
+@login_required
+def reset_calendar_token(request):
+    """
+    Nowy adres prywatnego kanału - poprzednie (np. udostępnione przez pomyłkę) przestają działać.
+    """
+    if request.method == 'POST':
+        get_profile(request.user)
+        UserProfile.objects.filter(user=request.user).update(calendar_token_version=F('calendar_token_version') + 1)
+        messages.success(request, 'Wygenerowano nowy adres kanału kalendarza. Poprzedni przestał działać.')
+
+    return redirect('my-events')
+
+
 @login_required
 def add_attachment(request, pk):
     event = get_object_or_404(Event, pk=pk)
@@ -174,6 +396,12 @@ def add_attachment(request, pk):
         return redirect('event-detail', pk=pk)
 
     if request.method == 'POST':
+        # Zbyt duże żądanie odrzucamy, zanim Django zacznie odbierać plik
+        max_size = attachment_max_size()
+        if max_size and int(request.META.get('CONTENT_LENGTH') or 0) > max_size + 64 * 1024:
+            messages.error(request, f'Plik jest za duży. Maksymalny rozmiar to {filesizeformat(max_size)}.')
+            return redirect('event-detail', pk=pk)
+
         form = AttachmentForm(request.POST, request.FILES)
         if form.is_valid():
             attachment = form.save(commit=False)
@@ -181,11 +409,41 @@ def add_attachment(request, pk):
             attachment.save()
             messages.success(request, 'Załącznik został dodany!')
         else:
-            messages.error(request, 'Błąd podczas dodawania załącznika.')
+            errors = form.errors.get('file') or ['Błąd podczas dodawania załącznika.']
+            messages.error(request, errors[0])
 
     return redirect('event-detail', pk=pk)
 
 
+@require_safe
+def download_attachment(request, pk):
+    attachment = get_object_or_404(
+        EventAttachment.objects.select_related('event').only('file', 'name', 'event__status', 'event__organizer_id'),
+        pk=pk,
+    )
+    # Załączniki szkiców widzi tylko organizator
+    event = attachment.event
+    if event.status == 'draft' and request.user.pk != event.organizer_id and not request.user.is_staff:
+        raise Http404
+
+    extension = os.path.splitext(attachment.file.name)[1]
+    filename = attachment.name if attachment.name.lower().endswith(extension.lower()) else attachment.name + extension
+    try:
+        return serve_file(request, attachment.file.storage, attachment.file.name, filename)
+    except FileNotFoundError:
+        raise Http404
+
+
+@login_required
+@require_safe
+def export_roster(request, pk):
+    """
+    Lista uczestników jako CSV (?format=excel - wariant dla Excela), tylko dla organizatora.
+    """
+    event = get_object_or_404(Event.objects.only('pk', 'organizer_id'), pk=pk, organizer=request.user)
+    return roster_response(request, event, excel=request.GET.get('format') == 'excel')
+
+
 @login_required
 def delete_attachment(request, pk):
     attachment = get_object_or_404(EventAttachment, pk=pk)
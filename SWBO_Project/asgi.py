@@ -9,8 +9,31 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from asgiref.wsgi import WsgiToAsgi
+from django.conf import settings
 from django.core.asgi import get_asgi_application
+from whitenoise import WhiteNoise
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SWBO_Project.settings')
+# Pliki statyczne obsługuje static_files poniżej, nie WhiteNoiseMiddleware (zob. settings.py)
+os.environ['DJANGO_STATIC_MIDDLEWARE'] = '0'
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+def not_found(environ, start_response):
+    start_response('404 Not Found', [('Content-Type', 'text/plain; charset=utf-8')])
+    return [b'Not Found']
+
+
+# WhiteNoise poza łańcuchem middleware: tylko żądania o pliki statyczne idą do wątku
+static_files = WsgiToAsgi(WhiteNoise(
+    not_found, root=settings.STATIC_ROOT, prefix=settings.STATIC_URL, max_age=0 if settings.DEBUG else 60,
+))
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].startswith(settings.STATIC_URL):
+        await static_files(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -0,0 +1,109 @@
+"""
+Odczyty z replik bazy danych.
+
+Repliki są używane tylko przez widoki oznaczone replica_reads i tylko dla
+modeli EventHub - sesje, użytkownicy i wszystkie zapisy idą do bazy głównej.
+Po żądaniu zapisującym (POST itp.) użytkownik dostaje podpisane ciasteczko,
+które przez DATABASE_REPLICA_PIN_SECONDS kieruje jego odczyty do bazy głównej,
+więc widzi własne zmiany mimo opóźnienia replikacji.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+
+PIN_COOKIE = 'db_pin'
+PIN_SALT = 'SWBO_Project.db_routing'
+REPLICATED_APPS = {'EventHub'}
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_reads(view):
+    """
+    Oznacza widok (funkcję lub klasę), którego odczyty mogą trafiać do replik.
+    """
+    view.replica_reads = True
+    return view
+
+
+def _is_replica_view(view_func):
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_func, 'replica_reads', False) or getattr(view_class, 'replica_reads', False)
+
+
+def is_pinned(request):
+    try:
+        request.get_signed_cookie(PIN_COOKIE, salt=PIN_SALT, max_age=settings.DATABASE_REPLICA_PIN_SECONDS)
+    except (KeyError, signing.BadSignature):
+        return False
+    return True
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if replicas and _replica_reads.get() and model._meta.app_label in REPLICATED_APPS:
+            return random.choice(replicas)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Repliki mają te same dane co baza główna
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Włącza odczyty z replik na czas oznaczonych widoków (łącznie z renderowaniem
+    szablonu) i przypina do bazy głównej użytkownika, który właśnie coś zapisał.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            # Bez reset(token): pod ASGI process_view ustawia flagę w innym kontekście
+            _replica_reads.set(False)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_reads.set(False)
+        return self.pin(request, response)
+
+    def pin(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 500:
+            response.set_signed_cookie(
+                PIN_COOKIE, '1', salt=PIN_SALT, max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in ('GET', 'HEAD')
+            and _is_replica_view(view_func)
+            and not is_pinned(request)
+        ):
+            _replica_reads.set(True)
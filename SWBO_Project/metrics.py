@@ -0,0 +1,151 @@
+"""
+Zbiorcze metryki czasu odpowiedzi (p50/p95/p99) per nazwa URL
+oraz stan pul połączeń z bazą danych.
+
+Każdy proces (worker gunicorna) trzyma ostatnie próbki w pamięci i co
+REQUEST_METRICS_FLUSH_INTERVAL sekund kopiuje je do wspólnego cache, do
+własnego slotu zajętego przez cache.add(). Nie ma wspólnego rejestru
+czytanego i nadpisywanego przez wiele procesów naraz - endpoint odczytuje
+wszystkie REQUEST_METRICS_MAX_WORKERS slotów jednym get_many(), a sloty
+martwych workerów wygasają. Przy wielu procesach cache musi być współdzielony
+(file, redis, memcached) - z locmem raport obejmuje tylko worker, który
+obsłużył żądanie, i mówi o tym w polu "warning".
+"""
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.http import HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+
+WORKER_KEY = 'request-metrics:worker:{}'
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    # Metoda najbliższej rangi
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def pool_stats():
+    """
+    Stan pul psycopg tego procesu: połączenia zajęte, oczekujący i łączny czas czekania.
+    """
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        raw = pool.get_stats()
+        size, available = raw.get('pool_size', 0), raw.get('pool_available', 0)
+        stats[alias] = {
+            'size': size,
+            'in_use': size - available,
+            'waiting': raw.get('requests_waiting', 0),
+            'requests': raw.get('requests_num', 0),
+            'wait_ms': raw.get('requests_wait_ms', 0),
+            'timeouts': raw.get('requests_errors', 0),
+        }
+    return stats
+
+
+class RollingMetrics:
+    def __init__(self, max_samples=500, flush_interval=10, max_workers=64):
+        self.max_samples = max_samples
+        self.flush_interval = flush_interval
+        self.max_workers = max_workers
+        self.slot = None
+        self.samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self.lock = threading.Lock()
+        self.last_flush = 0.0
+
+    def record(self, url_name, duration_ms, db_ms, queries):
+        with self.lock:
+            self.samples[url_name].append((duration_ms, db_ms, queries))
+            due = time.monotonic() - self.last_flush >= self.flush_interval
+            if due:
+                self.last_flush = time.monotonic()
+                snapshot = {name: list(values) for name, values in self.samples.items()}
+        if due:
+            self.flush(snapshot)
+
+    def flush(self, snapshot):
+        pid = os.getpid()
+        ttl = max(self.flush_interval * 6, 60)
+        entry = {'pid': pid, 'urls': snapshot, 'pools': pool_stats()}
+        if self.slot is not None:
+            key = WORKER_KEY.format(self.slot)
+            current = cache.get(key)
+            if current is not None and current['pid'] == pid:
+                cache.set(key, entry, timeout=ttl)
+                return
+            if current is None and cache.add(key, entry, timeout=ttl):
+                return
+        # Pierwszy zapis albo slot wygasł i zajął go inny proces (także po fork())
+        for slot in range(self.max_workers):
+            if cache.add(WORKER_KEY.format(slot), entry, timeout=ttl):
+                self.slot = slot
+                return
+        self.slot = None
+
+
+rolling_metrics = RollingMetrics(
+    max_samples=getattr(settings, 'REQUEST_METRICS_MAX_SAMPLES', 500),
+    flush_interval=getattr(settings, 'REQUEST_METRICS_FLUSH_INTERVAL', 10),
+    max_workers=getattr(settings, 'REQUEST_METRICS_MAX_WORKERS', 64),
+)
+
+
+def aggregate():
+    snapshots = cache.get_many([WORKER_KEY.format(slot) for slot in range(rolling_metrics.max_workers)])
+
+    merged = defaultdict(list)
+    pools = {}
+    for snapshot in snapshots.values():
+        for url_name, samples in snapshot['urls'].items():
+            merged[url_name].extend(samples)
+        # Pule są osobne w każdym workerze - sumujemy
+        for alias, stats in snapshot['pools'].items():
+            total = pools.setdefault(alias, dict.fromkeys(stats, 0))
+            for name, value in stats.items():
+                total[name] += value
+    for stats in pools.values():
+        stats['avg_wait_ms'] = round(stats['wait_ms'] / stats['requests'], 3) if stats['requests'] else 0
+
+    report = {}
+    for url_name, samples in sorted(merged.items()):
+        durations = sorted(sample[0] for sample in samples)
+        db_times = sorted(sample[1] for sample in samples)
+        queries = sorted(sample[2] for sample in samples)
+        report[url_name] = {
+            'count': len(samples),
+            'p50_ms': percentile(durations, 0.50),
+            'p95_ms': percentile(durations, 0.95),
+            'p99_ms': percentile(durations, 0.99),
+            'db_p95_ms': percentile(db_times, 0.95),
+            'queries_p50': percentile(queries, 0.50),
+            'queries_max': queries[-1],
+        }
+    result = {'workers': len(snapshots), 'urls': report, 'database_pools': pools}
+    if isinstance(caches['default'], LocMemCache):
+        result['warning'] = 'Cache locmem jest osobny dla każdego procesu - metryki tylko z tego workera.'
+    return result
+
+
+def metrics_view(request):
+    """
+    Metryki dla superusera albo klienta z nagłówkiem Authorization: Bearer <METRICS_TOKEN>.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.headers.get('Authorization', '')
+    authorized = (token and constant_time_compare(header, f'Bearer {token}')) or request.user.is_superuser
+    if not authorized:
+        return HttpResponseForbidden()
+    return JsonResponse(aggregate())
@@ -0,0 +1,125 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import rolling_metrics
+
+logger = logging.getLogger('swbo.requests')
+
+IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+
+
+class QueryCollector:
+    """
+    execute_wrapper zliczający zapytania, ich łączny czas i kształty SQL.
+    SQL przychodzi z placeholderami, więc kształt to tekst zapytania
+    z listami IN (...) sprowadzonymi do jednej postaci.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[IN_LIST.sub('(%s...)', sql)] += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Dla każdego żądania: liczba zapytań SQL, czas bazy, czas renderowania
+    szablonu (TemplateResponse) i nazwa widoku. Powtarzające się kształty
+    zapytań są zgłaszane jako prawdopodobne N+1.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.n_plus_one_threshold = settings.REQUEST_METRICS_N_PLUS_ONE_THRESHOLD
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        collector = QueryCollector()
+        request._template_render_time = 0.0
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        self.report(request, response, collector, duration)
+        return response
+
+    async def __acall__(self, request):
+        # Pod ASGI połączenia są lokalne dla kontekstu żądania, a ORM w sync_to_async
+        # dziedziczy ten kontekst - wrapper widzi zapytania z wątków roboczych
+        collector = QueryCollector()
+        request._template_render_time = 0.0
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = await self.get_response(request)
+        duration = time.perf_counter() - start
+
+        # Logowanie i okresowy zapis do cache poza pętlą zdarzeń
+        await sync_to_async(self.report, thread_sensitive=False)(request, response, collector, duration)
+        return response
+
+    def process_template_response(self, request, response):
+        render_start = time.perf_counter()
+
+        def measure(rendered):
+            request._template_render_time += time.perf_counter() - render_start
+
+        response.add_post_render_callback(measure)
+        return response
+
+    def report(self, request, response, collector, duration):
+        match = request.resolver_match
+        url_name = (match.view_name if match else None) or 'unresolved'
+        repeated = {
+            shape: count for shape, count in collector.shapes.items() if count >= self.n_plus_one_threshold
+        }
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': url_name,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'db_ms': round(collector.duration * 1000, 2),
+            'template_ms': round(request._template_render_time * 1000, 2),
+            'queries': collector.count,
+        }
+        if repeated:
+            record['n_plus_one'] = [
+                {'count': count, 'sql': shape[:300]} for shape, count in sorted(repeated.items(), key=lambda i: -i[1])
+            ]
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+
+        rolling_metrics.record(url_name, record['duration_ms'], record['db_ms'], collector.count)
@@ -0,0 +1,69 @@
+"""
+Indeksy dla wyszukiwania prefiksowego (__istartswith).
+
+PostgreSQL porównuje UPPER(kolumna::text) LIKE 'X%' - indeks na tym samym
+wyrażeniu z text_pattern_ops działa niezależnie od collation. W SQLite LIKE nie
+rozróżnia wielkości liter, więc indeks musi mieć COLLATE NOCASE. Kolumny bez
+wyszukiwania (prefix=False) dostają zwykły indeks.
+
+Własne modele deklarują PrefixIndex w Meta.indexes: stan migracji zna wtedy
+indeks, a SQLite odtwarza go po przebudowie tabeli (AlterField). Tabel innych
+aplikacji (auth_user) nie da się tak opisać - ich indeksy tworzy
+ensure_indexes() w migracji i ponownie po każdym migrate.
+"""
+from django.db import migrations, models
+from django.db.backends.ddl_references import Statement, Table
+
+
+def index_sql(vendor, column, prefix=True):
+    if vendor == 'postgresql':
+        return f'(UPPER("{column}"::text) text_pattern_ops)' if prefix else f'("{column}")'
+    if vendor == 'sqlite':
+        return f'("{column}" COLLATE NOCASE)' if prefix else f'("{column}")'
+    return None
+
+
+class PrefixIndex(models.Index):
+    """
+    Indeks jednej kolumny pod __istartswith. Inne bazy dostają zwykły indeks.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        column = model._meta.get_field(self.fields[0]).column
+        expression = index_sql(schema_editor.connection.vendor, column)
+        if expression is None:
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+        # Table zamiast nazwy - przebudowa tabeli w SQLite podmienia ją na nową
+        return Statement(
+            'CREATE INDEX %(name)s ON %(table)s %(expression)s',
+            name=schema_editor.quote_name(self.name),
+            table=Table(model._meta.db_table, schema_editor.quote_name),
+            expression=expression,
+        )
+
+
+def ensure_indexes(schema_editor, indexes):
+    """
+    Tworzy brakujące indeksy z listy (nazwa, tabela, kolumna, prefix).
+    """
+    vendor = schema_editor.connection.vendor
+    for name, table, column, prefix in indexes:
+        expression = index_sql(vendor, column, prefix)
+        if expression:
+            schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" {expression}')
+
+
+def create_indexes(indexes):
+    """
+    Operacja migracji tworząca indeksy z listy (nazwa, tabela, kolumna, prefix)
+    i usuwająca je przy cofaniu.
+    """
+    def create(apps, schema_editor):
+        ensure_indexes(schema_editor, indexes)
+
+    def drop(apps, schema_editor):
+        if index_sql(schema_editor.connection.vendor, ''):
+            for name, *_ in indexes:
+                schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+    return migrations.RunPython(create, drop)
@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import copy
 import os
 from pathlib import Path
 
@@ -44,7 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'SWBO_Project.middleware.RequestMetricsMiddleware',
+    'SWBO_Project.db_routing.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -53,6 +55,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# WhiteNoiseMiddleware działa tylko synchronicznie - pod ASGI Django uruchamiałby
+# go w wątku przy każdym żądaniu. SWBO_Project/asgi.py wyłącza go i obsługuje
+# pliki statyczne przed Django, więc łańcuch middleware zostaje asynchroniczny.
+STATIC_MIDDLEWARE = os.getenv('DJANGO_STATIC_MIDDLEWARE', '1') == '1'
+if STATIC_MIDDLEWARE:
+    MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'SWBO_Project.urls'
 
 TEMPLATES = [
@@ -66,6 +75,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'users.context_processors.permissions',
             ],
         },
     },
@@ -91,6 +101,118 @@ DATABASES = {
         }
     }
 
+if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    # SQLite ignoruje SELECT ... FOR UPDATE - blokada zapisu od początku transakcji
+    # zapobiega wyścigom przy zapisach na wydarzenia
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE', 'timeout': 20}
+    # Testowa baza w pliku zamiast w pamięci - testy współbieżności potrzebują
+    # bazy współdzielonej przez połączenia z różnych wątków
+    DATABASES['default']['TEST'] = {
+        'NAME': os.getenv('DATABASE_TEST_NAME', str(BASE_DIR / f'test_{Path(DATABASES["default"]["NAME"]).name}')),
+    }
+
+# Trwałe połączenia: worker używa tego samego połączenia w kolejnych żądaniach
+# zamiast za każdym razem łączyć się i uwierzytelniać. Health check sprawdza
+# połączenie na początku żądania, więc zerwane połączenie nie kończy się błędem.
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DATABASE_CONN_MAX_AGE', 60))
+DATABASES['default']['CONN_HEALTH_CHECKS'] = os.getenv('DATABASE_CONN_HEALTH_CHECKS', '1') == '1'
+
+# Pula połączeń psycopg (tylko PostgreSQL z psycopg 3 i psycopg-pool). Połączenia
+# wracają do puli po każdym żądaniu, więc CONN_MAX_AGE musi wynosić 0.
+if os.getenv('DATABASE_POOL', '0') == '1' and DATABASES['default']['ENGINE'].endswith('postgresql'):
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DATABASE_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DATABASE_POOL_MAX_SIZE', 10)),
+            # Maksymalny czas oczekiwania na wolne połączenie (sekundy)
+            'timeout': float(os.getenv('DATABASE_POOL_TIMEOUT', 10)),
+            'max_lifetime': float(os.getenv('DATABASE_POOL_MAX_LIFETIME', 1800)),
+            'max_idle': float(os.getenv('DATABASE_POOL_MAX_IDLE', 300)),
+            # Sprawdzenie połączenia przy wydaniu z puli
+            'check': ConnectionPool.check_connection,
+        },
+    }
+
+# Repliki tylko do odczytu: DATABASE_REPLICAS=host1[:port],host2[:port]
+# (dla SQLite - ścieżki plików). Pozostałe parametry jak w 'default'.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{index}'
+    if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+        DATABASES[alias] = {**copy.deepcopy(DATABASES['default']), 'NAME': replica.strip()}
+    else:
+        host, _, port = replica.strip().partition(':')
+        DATABASES[alias] = {
+            **copy.deepcopy(DATABASES['default']), 'HOST': host, 'PORT': port or DATABASES['default']['PORT'],
+        }
+    # W testach replika wskazuje na testową bazę główną
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['SWBO_Project.db_routing.ReplicaRouter']
+# Jak długo po zapisie odczyty użytkownika idą do bazy głównej (sekundy)
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# locmem wystarcza dla jednego procesu i testów. Wersje w cache (kategorie,
+# uprawnienia) i metryki workerów muszą być wspólne dla procesów, więc przy
+# WEB_CONCURRENCY > 1 domyślny jest 'file' (wspólny katalog); można też
+# wybrać 'redis'/'memcached'
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+}
+
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+CACHE_BACKEND = os.getenv('CACHE_BACKEND') or ('file' if WEB_CONCURRENCY > 1 else 'locmem')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            str(BASE_DIR / '.cache') if CACHE_BACKEND == 'file' else 'swbo',
+        ),
+    }
+}
+
+# Czas życia fragmentów szablonów (sekundy); unieważniane wcześniej przez wersje
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', 600))
+
+# Panel "Moje wydarzenia": krótki czas życia, bo liczniki uczestników zmieniają
+# także zapisy innych osób; własne zapisy i edycje unieważniają go od razu
+MY_EVENTS_CACHE_TIMEOUT = int(os.getenv('MY_EVENTS_CACHE_TIMEOUT', 60))
+
+# Zapamiętane uprawnienie do tworzenia wydarzeń (users/permissions.py); zmiany
+# uprawnień unieważniają je od razu, czas życia tylko ogranicza rozmiar cache
+PERMISSION_CACHE_TIMEOUT = int(os.getenv('PERMISSION_CACHE_TIMEOUT', 3600))
+
+# Kanały iCalendar: gotowe kanały do ICAL_FEED_CACHE_MAX_EVENTS wydarzeń leżą w cache
+# (klucz z najnowszym updated_at), większe są generowane strumieniowo
+ICAL_FEED_CACHE_TIMEOUT = int(os.getenv('ICAL_FEED_CACHE_TIMEOUT', 3600))
+ICAL_FEED_CACHE_MAX_EVENTS = int(os.getenv('ICAL_FEED_CACHE_MAX_EVENTS', 1000))
+# Jak długo pośrednie cache mogą trzymać publiczne kanały bez pytania o zmiany
+ICAL_FEED_MAX_AGE = int(os.getenv('ICAL_FEED_MAX_AGE', 300))
+
+# Asynchroniczne widoki listy, szczegółów i panelu (EventHub/async_views.py);
+# start.sh włącza je przy SERVER_MODE=asgi
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS', '0') == '1'
+
+
+# Użytkownik sesji wczytywany razem z profilem (users/backends.py). ModelBackend
+# na końcu tylko dla sesji zapisanych przed zmianą - logowanie obsługuje pierwszy.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.ProfileModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -134,10 +256,47 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Limit rozmiaru pojedynczego załącznika (bajty). Pliki większe niż
+# FILE_UPLOAD_MAX_MEMORY_SIZE Django zapisuje podczas wysyłania na dysk, nie do pamięci.
+ATTACHMENT_MAX_SIZE = int(os.environ.get('ATTACHMENT_MAX_SIZE', 20 * 1024 * 1024))
+
+# Wysyłanie załączników przez serwer przed aplikacją: 'x-accel-redirect' (nginx),
+# 'x-sendfile' (Apache/lighttpd) albo puste - FileResponse z Django.
+# Dla nginx ATTACHMENT_SENDFILE_URL musi być lokacją `internal` z `alias` na MEDIA_ROOT.
+ATTACHMENT_SENDFILE_BACKEND = os.environ.get('ATTACHMENT_SENDFILE_BACKEND', '')
+ATTACHMENT_SENDFILE_URL = os.environ.get('ATTACHMENT_SENDFILE_URL', '/protected-media/')
+
+# 'offset' (numerowane strony) lub 'cursor' (keyset, bez COUNT i OFFSET)
+EVENT_LIST_PAGINATION = os.environ.get('EVENT_LIST_PAGINATION', 'offset')
+
 LOGIN_REDIRECT_URL = 'event-list'
 LOGIN_URL = 'login'
 LOGOUT_REDIRECT_URL = 'event-list'
 
+# Metryki żądań: liczba zapytań, czas bazy i szablonów, wykrywanie N+1
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', '1') == '1'
+REQUEST_METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv('REQUEST_METRICS_N_PLUS_ONE_THRESHOLD', 5))
+REQUEST_METRICS_MAX_SAMPLES = int(os.getenv('REQUEST_METRICS_MAX_SAMPLES', 500))
+REQUEST_METRICS_FLUSH_INTERVAL = int(os.getenv('REQUEST_METRICS_FLUSH_INTERVAL', 10))
+REQUEST_METRICS_MAX_WORKERS = int(os.getenv('REQUEST_METRICS_MAX_WORKERS', 64))
+# Token dla zewnętrznych zbieraczy metryk (nagłówek Authorization: Bearer <token>)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'swbo.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('DJANGO_LOGLEVEL', 'warning').upper(),
+            'propagate': False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -7,5 +7,16 @@ python manage.py migrate
 echo "=== Collecting static files ==="
 python manage.py collectstatic --noinput --clear
 
+# Eksportowane także dla settings.py - przy kilku workerach domyślny cache jest wspólny
+export WEB_CONCURRENCY=${WEB_CONCURRENCY:-3}
+WORKERS=$WEB_CONCURRENCY
+
+if [ "$SERVER_MODE" = "asgi" ]; then
+    # Asynchroniczne widoki - wolni klienci i czekanie na bazę nie blokują workera
+    export DJANGO_ASYNC_VIEWS=1
+    echo "=== Starting Uvicorn (ASGI) ==="
+    exec uvicorn SWBO_Project.asgi:application --host 0.0.0.0 --port $PORT --workers $WORKERS --lifespan off --no-server-header
+fi
+
 echo "=== Starting Gunicorn ==="
-exec gunicorn --bind 0.0.0.0:$PORT --workers 3 SWBO_Project.wsgi:application
\ No newline at end of file
+exec gunicorn --bind 0.0.0.0:$PORT --workers $WORKERS SWBO_Project.wsgi:application
\ No newline at end of file
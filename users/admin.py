@@ -15,9 +15,11 @@ class CustomUserAdmin(UserAdmin):
     inlines = (UserProfileInline,)
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'is_superuser', 'can_create_events')
     list_filter = ('is_staff', 'is_superuser', 'userprofile__can_create_events')
+    list_select_related = ('userprofile',)
 
     def can_create_events(self, obj):
-        return obj.userprofile.can_create_events
+        profile = getattr(obj, 'userprofile', None)
+        return profile is not None and profile.can_create_events
 
     can_create_events.boolean = True
     can_create_events.short_description = 'Może tworzyć wydarzenia'
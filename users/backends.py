@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend, który wczytuje użytkownika sesji razem z profilem (JOIN),
+    więc request.user.userprofile w widokach i base.html nie kosztuje
+    osobnego zapytania.
+
+    Domyślny ModelBackend zostaje na liście za nim, żeby działały sesje
+    zapisane przed zmianą. Logowanie dziedziczy zachowanie ModelBackend:
+    nieudane zwraca None, więc Django pyta kolejne backendy z listy.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related('userprofile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        try:
+            user = await UserModel._default_manager.select_related('userprofile').aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,13 @@
+from django.utils.functional import SimpleLazyObject
+
+from .permissions import can_create_events
+
+
+def permissions(request):
+    """
+    can_create_events w szablonach - liczone dopiero przy pierwszym użyciu.
+    """
+    user = getattr(request, 'user', None)
+    return {
+        'can_create_events': SimpleLazyObject(lambda: user is not None and can_create_events(user)),
+    }
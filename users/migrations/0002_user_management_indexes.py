@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from SWBO_Project.prefix_indexes import create_indexes
+
+# Indeksy auth_user dla listy zarządzania użytkownikami i panelu administracyjnego:
+# wyszukiwanie prefiksowe po nazwie i e-mailu, sortowanie po dacie dołączenia.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        create_indexes([
+            ('auth_user_username_prefix_idx', 'auth_user', 'username', True),
+            ('auth_user_email_prefix_idx', 'auth_user', 'email', True),
+            ('auth_user_date_joined_idx', 'auth_user', 'date_joined', False),
+        ]),
+    ]
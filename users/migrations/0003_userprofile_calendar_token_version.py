@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_management_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='calendar_token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,7 +1,17 @@
-from django.db import models
+from django.db import connections, models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
+from SWBO_Project.prefix_indexes import ensure_indexes
+
+# Indeksy auth_user z migracji 0002. Tabela należy do aplikacji auth, więc stan
+# migracji ich nie zna i przebudowa tabeli (np. migracja auth w nowym Django) je usuwa
+USER_MANAGEMENT_INDEXES = [
+    ('auth_user_username_prefix_idx', 'auth_user', 'username', True),
+    ('auth_user_email_prefix_idx', 'auth_user', 'email', True),
+    ('auth_user_date_joined_idx', 'auth_user', 'date_joined', False),
+]
 
 
 class UserProfile(models.Model):
@@ -9,18 +19,47 @@ class UserProfile(models.Model):
     can_create_events = models.BooleanField(default=False)
     bio = models.TextField(max_length=500, blank=True)
     phone = models.CharField(max_length=20, blank=True)
+    # Podbijana przy resecie adresu prywatnego kanału kalendarza - stare adresy przestają działać
+    calendar_token_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.user.username} - Profile"
 
 
-# Sygnał do automatycznego tworzenia profilu
+def get_profile(user):
+    """
+    Profil użytkownika: z obiektu, jeśli został już wczytany (np. przez
+    select_related), a dla kont bez profilu - tworzony przy pierwszym dostępie.
+    """
+    try:
+        return user.userprofile
+    except UserProfile.DoesNotExist:
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        user.userprofile = profile
+        return profile
+
+
+# Sygnał do automatycznego tworzenia profilu. Profil nie jest zapisywany przy
+# każdym zapisie użytkownika (np. last_login przy logowaniu) - zmiany pól profilu
+# zapisują formularze profilu i uprawnień.
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
 
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.userprofile.save()
\ No newline at end of file
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_event_permission(sender, instance, **kwargs):
+    from .permissions import invalidate
+    invalidate(instance.user_id)
+
+
+@receiver(post_migrate)
+def restore_user_management_indexes(sender, using, **kwargs):
+    connection = connections[using]
+    if sender.label == 'users' and (
+        ('users', '0002_user_management_indexes') in MigrationRecorder(connection).applied_migrations()
+    ):
+        with connection.schema_editor() as schema_editor:
+            ensure_indexes(schema_editor, USER_MANAGEMENT_INDEXES)
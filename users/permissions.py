@@ -0,0 +1,84 @@
+"""
+Uprawnienie do tworzenia, edycji i usuwania wydarzeń: superuser albo
+UserProfile.can_create_events.
+
+Użytkownik sesji jest wczytywany razem z profilem (users/backends.py), więc
+sprawdzenie dla request.user nie kosztuje zapytania. Dla użytkowników bez
+wczytanego profilu wynik leży w cache pod kluczem użytkownika razem z wersją
+globalną: zmiana profilu jednej osoby usuwa jej wpis, a operacje zbiorcze
+podbijają wersję globalną, co unieważnia wszystkie wpisy naraz. Wynik jest też
+zapamiętywany na obiekcie użytkownika do końca żądania.
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import UserProfile
+
+VERSION_KEY = 'users:permissions:version'
+
+
+def _user_key(user_id):
+    return f'users:user:{user_id}:can_create_events'
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def _load(user):
+    if User.userprofile.is_cached(user):
+        profile = getattr(user, 'userprofile', None)
+        return profile is not None and profile.can_create_events
+
+    key = _user_key(user.pk)
+    stored = cache.get_many([VERSION_KEY, key])
+    version = stored.get(VERSION_KEY)
+    if version is None:
+        version = _new_version()
+        cache.set(VERSION_KEY, version, timeout=None)
+    elif key in stored and stored[key][0] == version:
+        return stored[key][1]
+
+    allowed = UserProfile.objects.filter(user_id=user.pk, can_create_events=True).exists()
+    cache.set(key, (version, allowed), settings.PERMISSION_CACHE_TIMEOUT)
+    return allowed
+
+
+def can_create_events(user):
+    if not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    if not hasattr(user, '_can_create_events'):
+        user._can_create_events = _load(user)
+    return user._can_create_events
+
+
+def invalidate(user_id):
+    """
+    Usuwa zapamiętane uprawnienie użytkownika po zatwierdzeniu transakcji.
+    """
+    transaction.on_commit(lambda: cache.delete(_user_key(user_id)))
+
+
+def invalidate_all():
+    # Po zmianach zbiorczych - bez wyszukiwania kluczy poszczególnych użytkowników
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, _new_version(), timeout=None))
+
+
+class EventCreatorRequiredMixin(UserPassesTestMixin):
+    """
+    Dostęp tylko dla użytkowników z uprawnieniem do tworzenia wydarzeń.
+    Widoki z dodatkowym warunkiem rozszerzają has_permission_for_object().
+    """
+
+    def test_func(self):
+        return can_create_events(self.request.user) and self.has_permission_for_object()
+
+    def has_permission_for_object(self):
+        return True
@@ -1,3 +1,157 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from . import permissions
+from .models import UserProfile
+from .views import USERS_PAGINATE_BY
+
+ACCESS_CODE = 'kod-dostepu'
+
+
+class AccessCodeBackend(BaseBackend):
+    # Backend za ProfileModelBackend - dostaje szansę, gdy hasło się nie zgadza
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if password == ACCESS_CODE:
+            return User.objects.filter(username=username).first()
+        return None
+
+    def get_user(self, user_id):
+        return User.objects.filter(pk=user_id).first()
+
+
+class UserManagementTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'haslo')
+        cls.alice = User.objects.create_user('alicja', 'alicja@uczelnia.pl', 'haslo')
+        cls.bob = User.objects.create_user('bartek', 'bartek@firma.pl', 'haslo')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def permissions(self):
+        return dict(UserProfile.objects.values_list('user__username', 'can_create_events'))
+
+    def test_list_is_paginated_with_constant_queries(self):
+        User.objects.bulk_create(User(username=f'user{i}', email=f'user{i}@example.com') for i in range(60))
+        # sesja, użytkownik z profilem, statystyki, COUNT listy, strona z profilami
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('user-management'))
+        self.assertEqual(len(response.context['users']), USERS_PAGINATE_BY)
+        self.assertEqual(response.context['stats']['total'], 63)
+
+    def test_search_by_username_or_email_prefix(self):
+        response = self.client.get(reverse('user-management'), {'q': 'ALI'})
+        self.assertEqual([user.username for user in response.context['users']], ['alicja'])
+        response = self.client.get(reverse('user-management'), {'q': 'bartek@'})
+        self.assertEqual([user.username for user in response.context['users']], ['bartek'])
+
+    def test_toggle_is_conditional(self):
+        url = reverse('toggle-event-permission', args=[self.alice.pk])
+        self.client.post(url, {'action': 'grant'})
+        # Drugie przyznanie (np. drugi administrator) niczego nie odwraca
+        response = self.client.post(url, {'action': 'grant', 'query': 'q=ali&page=1'})
+        self.assertRedirects(response, reverse('user-management') + '?q=ali&page=1', fetch_redirect_response=False)
+        self.assertTrue(self.permissions()['alicja'])
+
+    def test_bulk_update_for_selection_and_filter(self):
+        url = reverse('bulk-event-permission')
+        with self.assertNumQueries(4):  # sesja, użytkownik, jedno UPDATE i szukanie kont bez profilu
+            self.client.post(url, {'action': 'grant', 'scope': 'selected', 'user_ids': [self.alice.pk, self.bob.pk]})
+        self.assertEqual(self.permissions(), {'admin': False, 'alicja': True, 'bartek': True})
+
+        self.client.post(url, {'action': 'revoke', 'scope': 'filter', 'query': 'q=bartek'})
+        self.assertEqual(self.permissions(), {'admin': False, 'alicja': True, 'bartek': False})
+
+    def test_users_without_profile_get_one(self):
+        UserProfile.objects.filter(user__in=[self.alice, self.bob]).delete()
+        self.client.post(reverse('toggle-event-permission', args=[self.alice.pk]), {'action': 'grant'})
+        self.assertTrue(self.permissions()['alicja'])
+
+        response = self.client.post(reverse('bulk-event-permission'), {'action': 'grant', 'scope': 'filter'},
+                                    follow=True)
+        self.assertEqual(self.permissions(), {'admin': False, 'alicja': True, 'bartek': True})
+        self.assertTrue(str(list(response.context['messages'])[-1]).endswith('Zmienionych użytkowników: 1'))
+
+    def test_login_does_not_touch_profile(self):
+        UserProfile.objects.filter(user=self.bob).delete()
+        self.client.logout()
+        # Bez SELECT i UPDATE profilu po zapisie last_login (i bez błędu dla konta bez profilu)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('login'), {'username': 'bartek', 'password': 'haslo'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(any('users_userprofile' in query['sql'] for query in queries.captured_queries))
+
+    def test_sessions_from_default_backend_stay_valid(self):
+        self.client.force_login(self.bob, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+
+        self.client.logout()
+        response = self.client.post(reverse('login'), {'username': 'bartek', 'password': 'zle'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_failed_login_falls_through_to_later_backends(self):
+        self.client.logout()
+        backends = [*settings.AUTHENTICATION_BACKENDS, 'users.tests.AccessCodeBackend']
+        with override_settings(AUTHENTICATION_BACKENDS=backends):
+            response = self.client.post(reverse('login'), {'username': 'bartek', 'password': ACCESS_CODE})
+        self.assertEqual(response.status_code, 302)
+
+    def test_profile_is_created_on_first_access(self):
+        UserProfile.objects.filter(user=self.bob).delete()
+        self.client.force_login(self.bob)
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(UserProfile.objects.filter(user=self.bob).exists())
+
+    def test_requires_superuser(self):
+        self.client.force_login(self.alice)
+        self.client.post(reverse('bulk-event-permission'), {'action': 'grant', 'scope': 'filter'})
+        self.assertFalse(any(self.permissions().values()))
+
+
+class EventPermissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'haslo')
+        cls.user = User.objects.create_user('organizator', 'org@example.com', 'haslo')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_create_view_requires_permission(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('event-create')).status_code, 403)
+        self.assertNotContains(self.client.get(reverse('event-list')), reverse('event-create'))
+
+        self.client.force_login(self.admin)
+        self.client.post(reverse('toggle-event-permission', args=[self.user.pk]), {'action': 'grant'})
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('event-create')).status_code, 200)
+        self.assertContains(self.client.get(reverse('event-list')), reverse('event-create'))
+
+    def test_cached_result_is_invalidated_by_profile_changes(self):
+        # Obiekt bez wczytanego profilu - wynik z bazy, a potem z cache
+        with self.assertNumQueries(1):
+            self.assertFalse(permissions.can_create_events(self.fresh_user()))
+        with self.assertNumQueries(0):
+            self.assertFalse(permissions.can_create_events(self.fresh_user()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_login(self.admin)
+            self.client.post(reverse('edit-user-permissions', args=[self.user.pk]), {'can_create_events': 'on'})
+        self.assertTrue(permissions.can_create_events(self.fresh_user()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('bulk-event-permission'), {'action': 'revoke', 'scope': 'filter'})
+        self.assertFalse(permissions.can_create_events(self.fresh_user()))
+
+    def fresh_user(self):
+        # Użytkownik bez wczytanego profilu i bez wyniku zapamiętanego w obiekcie
+        return User(pk=self.user.pk, username=self.user.username)
@@ -6,6 +6,7 @@ urlpatterns = [
     path('register/', views.register, name='register'),
     path('profile/', views.profile, name='profile'),
     path('management/', views.user_management, name='user-management'),
+    path('management/bulk-permission/', views.bulk_event_permission, name='bulk-event-permission'),
     path('toggle-permission/<int:user_id>/', views.toggle_event_permission, name='toggle-event-permission'),
     path('edit-permissions/<int:user_id>/', views.edit_user_permissions, name='edit-user-permissions'),
     path('login/', auth_views.LoginView.as_view(template_name='users/login.html'), name='login'),
@@ -1,10 +1,20 @@
 from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from django.http import QueryDict
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.decorators import user_passes_test
+from django.urls import reverse
 from .forms import UserRegisterForm, UserUpdateForm, UserProfileForm, UserPermissionsForm
+from .models import UserProfile, get_profile
+from .permissions import invalidate, invalidate_all
+
+USERS_PAGINATE_BY = 50
+PERMISSION_FILTERS = ('granted', 'revoked')
+PERMISSION_ACTIONS = ('grant', 'revoke')
 
 
 def register(request):
@@ -24,16 +34,19 @@ def register(request):
 def profile(request):
     if request.method == 'POST':
         user_form = UserUpdateForm(request.POST, instance=request.user)
-        profile_form = UserProfileForm(request.POST, instance=request.user.userprofile)
+        profile_form = UserProfileForm(request.POST, instance=get_profile(request.user))
 
         if user_form.is_valid() and profile_form.is_valid():
-            user_form.save()
-            profile_form.save()
+            # Zapis tylko zmienionych formularzy - bez UPDATE niezmienionych wierszy
+            if user_form.has_changed():
+                user_form.save()
+            if profile_form.has_changed():
+                profile_form.save()
             messages.success(request, 'Twój profil został zaktualizowany!')
             return redirect('profile')
     else:
         user_form = UserUpdateForm(instance=request.user)
-        profile_form = UserProfileForm(instance=request.user.userprofile)
+        profile_form = UserProfileForm(instance=get_profile(request.user))
 
     return render(request, 'users/profile.html', {
         'user_form': user_form,
@@ -47,45 +60,127 @@ def custom_logout(request):
     return redirect('event-list')
 
 
-def can_create_events(user):
-    return user.is_authenticated and (
-            user.is_superuser or
-            hasattr(user, 'userprofile') and user.userprofile.can_create_events
-    )
-
-
 def superuser_required(view_func):
     return user_passes_test(lambda u: u.is_superuser)(view_func)
 
 
+def managed_users(params):
+    """
+    Użytkownicy listy zarządzania po wyszukiwaniu i filtrze uprawnień z `params`.
+    Wyszukiwanie jest prefiksowe (nazwa użytkownika lub e-mail), żeby korzystało
+    z indeksów z migracji EventHub 0009 i users 0002.
+    """
+    users = User.objects.all()
+    search = params.get('q', '').strip()
+    if search:
+        users = users.filter(Q(username__istartswith=search) | Q(email__istartswith=search))
+    permission = params.get('permission')
+    if permission == 'granted':
+        users = users.filter(userprofile__can_create_events=True)
+    elif permission == 'revoked':
+        users = users.exclude(userprofile__can_create_events=True)
+    return users
+
+
+def management_redirect(request):
+    # Powrót na tę samą stronę listy - z wyszukiwaniem, filtrem i numerem strony
+    query = QueryDict(request.POST.get('query', '')).urlencode()
+    url = reverse('user-management')
+    return redirect(f'{url}?{query}' if query else url)
+
+
 # Widok zarządzania użytkownikami - TYLKO DLA SUPERUSERA
 @superuser_required
 def user_management(request):
-    users = User.objects.all().select_related('userprofile').order_by('-date_joined')
-    return render(request, 'users/user_management.html', {'users': users})
+    """
+    Lista użytkowników stronicowana po USERS_PAGINATE_BY, z wyszukiwaniem
+    i filtrem uprawnień. Statystyki liczy jedno zapytanie agregujące.
+    """
+    stats = User.objects.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(is_active=True)),
+        organizers=Count('pk', filter=Q(is_superuser=True) | Q(userprofile__can_create_events=True)),
+    )
+    users = managed_users(request.GET).select_related('userprofile').order_by('-date_joined', '-pk')
+    page = Paginator(users, USERS_PAGINATE_BY).get_page(request.GET.get('page'))
+
+    return render(request, 'users/user_management.html', {
+        'page_obj': page,
+        'users': page.object_list,
+        'stats': stats,
+        'search': request.GET.get('q', '').strip(),
+        'permission': request.GET.get('permission') if request.GET.get('permission') in PERMISSION_FILTERS else '',
+    })
 
 
 @superuser_required
 def toggle_event_permission(request, user_id):
     user = get_object_or_404(User, id=user_id)
-    profile = user.userprofile
-    profile.can_create_events = not profile.can_create_events
-    profile.save()
 
-    action = "przyznano" if profile.can_create_events else "cofnięto"
-    messages.success(request, f'Uprawnienia do tworzenia wydarzeń {action} dla {user.username}')
-    return redirect('user-management')
+    if request.method == 'POST' and request.POST.get('action') in PERMISSION_ACTIONS:
+        # Jawna akcja i warunkowe UPDATE zamiast odczytu i zapisu - dwa kliknięcia
+        # naraz nie odwracają nawzajem swoich zmian
+        value = request.POST['action'] == 'grant'
+        updated = UserProfile.objects.filter(user=user, can_create_events=not value).update(can_create_events=value)
+        if updated:
+            # update() omija sygnały - zapamiętane uprawnienie unieważniane ręcznie
+            invalidate(user.pk)
+        else:
+            # Konto bez profilu - profil tworzony od razu z wybraną wartością
+            _, updated = UserProfile.objects.get_or_create(user=user, defaults={'can_create_events': value})
+
+        action = "przyznano" if value else "cofnięto"
+        if updated:
+            messages.success(request, f'Uprawnienia do tworzenia wydarzeń {action} dla {user.username}')
+        else:
+            messages.warning(request, f'Uprawnienia do tworzenia wydarzeń dla {user.username} były już zmienione')
+
+    return management_redirect(request)
+
+
+@superuser_required
+def bulk_event_permission(request):
+    """
+    Przyznanie albo cofnięcie uprawnień zaznaczonym użytkownikom (scope=selected)
+    albo wszystkim pasującym do wyszukiwania i filtra listy (scope=filter).
+    """
+    if request.method == 'POST' and request.POST.get('action') in PERMISSION_ACTIONS:
+        value = request.POST['action'] == 'grant'
+        if request.POST.get('scope') == 'filter':
+            users = managed_users(QueryDict(request.POST.get('query', '')))
+        else:
+            users = User.objects.filter(pk__in=[pk for pk in request.POST.getlist('user_ids') if pk.isdigit()])
+
+        users = users.filter(is_superuser=False)
+        # Jedno UPDATE ... WHERE user_id IN (SELECT ...) - tylko wiersze, które się zmieniają
+        updated = UserProfile.objects.filter(
+            user__in=users.values('pk'), can_create_events=not value,
+        ).update(can_create_events=value)
+        if value:
+            # Konta bez profilu dostają go z uprawnieniem; przy cofaniu brak profilu oznacza brak uprawnień
+            missing = users.filter(userprofile__isnull=True).values_list('pk', flat=True)
+            updated += len(UserProfile.objects.bulk_create(
+                [UserProfile(user_id=user_id, can_create_events=True) for user_id in missing], ignore_conflicts=True,
+            ))
+        if updated:
+            invalidate_all()
+
+        action = "Przyznano" if value else "Cofnięto"
+        messages.success(request, f'{action} uprawnienia do tworzenia wydarzeń. Zmienionych użytkowników: {updated}')
+
+    return management_redirect(request)
 
 
 @superuser_required
 def edit_user_permissions(request, user_id):
-    user = get_object_or_404(User, id=user_id)
-    profile = user.userprofile
+    user = get_object_or_404(User.objects.select_related('userprofile'), id=user_id)
+    profile = get_profile(user)
 
     if request.method == 'POST':
         form = UserPermissionsForm(request.POST, instance=profile)
         if form.is_valid():
-            form.save()
+            if form.has_changed():
+                form.save()
             messages.success(request, f'Uprawnienia użytkownika {user.username} zostały zaktualizowane!')
             return redirect('user-management')
     else: